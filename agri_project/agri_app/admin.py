@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import Farmer, Crop, Field, Activity, WeatherRecord, SecureRoute, Review, Post, Comment
+from .models import Farmer, Crop, Field, Activity, WeatherRecord, WeatherRollup, SecureRoute, Review, Post, Comment
 
 
 # --------------------------
@@ -95,6 +95,14 @@ class WeatherRecordAdmin(admin.ModelAdmin):
     get_field.short_description = 'Field'
 
 
+@admin.register(WeatherRollup)
+class WeatherRollupAdmin(admin.ModelAdmin):
+    # Rollups are derived data: rebuild with `manage.py rebuild_weather_rollups` instead of editing
+    list_display = ('farmer', 'field', 'bucket', 'bucket_start', 'reading_count', 'rainfall_total')
+    list_filter = ('bucket',)
+    list_select_related = ['farmer', 'field']
+
+
 # -----------------------
 # Secure Route Admin (New Name: RouteSafety -> SecureRoute)
 # -----------------------
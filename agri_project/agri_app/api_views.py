@@ -1,5 +1,13 @@
-from rest_framework import viewsets, permissions, generics, filters
-from .models import Farmer, Field, Crop, WeatherRecord, SecureRoute, Activity, Review, Post ,Comment
+from rest_framework import viewsets, permissions, generics, filters, status
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from .models import Farmer, Field, Crop, WeatherRecord, WeatherRollup, SecureRoute, Activity, Review, Post ,Comment
 from .serializers import (
     FarmerListSerializer, FarmerDetailSerializer, 
     FarmerCreateSerializer, FarmerUpdateSerializer,
@@ -11,13 +19,69 @@ from .serializers import (
     WeatherRecordDetailSerializer, WeatherRecordCreateUpdateSerializer,
     SecureRouteListSerializer, SecureRouteDetailSerializer, 
     SecureRouteCreateUpdateSerializer, ReviewSerializer, 
-    PostSerializer
+    PostSerializer, WeatherRollupSerializer, CropIndicatorsSerializer, CommentThreadSerializer,
+    PostSearchSerializer,
 )
 from .permissions import IsOwnerOrReadOnly
-from rest_framework.authentication import TokenAuthentication
+from .filters import SecureRouteGeoFilter, RankedSearchFilter
+from .geo import level_for_zoom, ROUTE_SIMPLIFY_PRESETS
+from .search import search_routes, search_posts, post_tag_facets
+from .parsers import NDJSONParser
+from .ingestion import ingest_weather_rows, WEATHER_BULK_MAX_ROWS
+from .exports import stream_weather_export, EXPORT_FORMATS
+from .indicators import compute_crop_indicators
+from .sync import build_sync_payload, decode_cursor
+from .batch import apply_batch, BATCH_MAX_OPERATIONS
+from .cache import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .related import AutoRelatedMixin
+from .metrics import registry as metrics_registry
+from .renderers import PrometheusRenderer
+from .dashboard import get_dashboard
+from .threads import load_thread, THREAD_PAGE_SIZE, THREAD_MAX_PAGE_SIZE
+from rest_framework.utils.urls import replace_query_param
+from .authentication import CachedTokenAuthentication
 
-class FarmerViewSet(viewsets.ModelViewSet):
+
+def _parse_boundary(value, param, end=False):
+    """
+    Turns a ?start= / ?end= value (date or ISO datetime) into an aware datetime.
+    A bare end date covers the whole day, so the returned bound is exclusive.
+    """
+    try:
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        return datetime.combine(day, time.min, tzinfo=dt_timezone.utc), 'lt' if end else 'gte'
+    if moment is None:
+        raise ValidationError({param: "Expected a date (YYYY-MM-DD) or an ISO 8601 datetime."})
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=dt_timezone.utc)
+    return moment, 'lte' if end else 'gte'
+
+def filter_by_field_and_dates(queryset, params, date_field):
+    """Applies the ?field=, ?start= and ?end= filters shared by the weather endpoints."""
+    field_id = params.get('field')
+    if field_id:
+        if not field_id.isdigit():
+            raise ValidationError({'field': "Expected a field id."})
+        queryset = queryset.filter(field_id=field_id)
+
+    for param in ('start', 'end'):
+        value = params.get(param)
+        if value:
+            moment, lookup = _parse_boundary(value, param, end=(param == 'end'))
+            queryset = queryset.filter(**{f'{date_field}__{lookup}': moment})
+    return queryset
+
+class FarmerViewSet(AutoRelatedMixin, viewsets.ModelViewSet):
     queryset = Farmer.objects.all()
+    ordering = ('id',)
     filter_backends = [filters.SearchFilter]
     search_fields = ['username', 'farm_name', 'first_name', 'last_name','city_or_region']
 
@@ -52,7 +116,9 @@ class FarmerViewSet(viewsets.ModelViewSet):
         # Filter the Farmer table so only the logged-in user's data is returned
         return Farmer.objects.filter(id=user.id)
          
-class FieldViewSet(viewsets.ModelViewSet):
+class FieldViewSet(ConditionalGetMixin, CachedResponseMixin, AutoRelatedMixin, viewsets.ModelViewSet):
+    cache_models = ('field',)
+    ordering = ('id',)
     filter_backends = [filters.SearchFilter]
     search_fields = ['size_in_hectares', 'soil_type']
 
@@ -70,9 +136,12 @@ class FieldViewSet(viewsets.ModelViewSet):
         serializer.save(farmer=self.request.user)    
         
     
-class CropViewSet(viewsets.ModelViewSet):
+class CropViewSet(ConditionalGetMixin, CachedResponseMixin, AutoRelatedMixin, viewsets.ModelViewSet):
+    # Crop details embed weather-based indicators
+    cache_models = ('crop', 'field', 'weatherrecord')
+    ordering = ('-planted_on', '-id')
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'category', 'status']
 
@@ -85,14 +154,36 @@ class CropViewSet(viewsets.ModelViewSet):
         if self.action == 'retrieve':
             return CropDetailSerializer
         return CropCreateUpdateSerializer
+
+    @action(detail=False, methods=['get'], url_path='indicators')
+    def indicators(self, request):
+        """
+        Agronomic indicators for all of the farmer's crops (or ?ids=1,2,3) in one call.
+        """
+        crops = self.get_queryset().only('id', 'name', 'fields', 'status', 'planted_on', 'expected_harvest')
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                crops = crops.filter(id__in=[int(crop_id) for crop_id in ids.split(',')])
+            except ValueError:
+                raise ValidationError({'ids': "Expected a comma-separated list of crop ids."})
+
+        crops = list(crops)
+        serializer = CropIndicatorsSerializer(
+            crops, many=True, context={'indicators': compute_crop_indicators(crops)}
+        )
+        return Response(serializer.data)
     
-class ActivityViewSet(viewsets.ModelViewSet):
+class ActivityViewSet(ConditionalGetMixin, CachedResponseMixin, AutoRelatedMixin, viewsets.ModelViewSet):
+    cache_models = ('activity', 'field', 'crop')
+    ordering = ('scheduled_date', 'id')
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
    
 
     def get_queryset(self):
-        return Activity.objects.filter(field__farmer=self.request.user).order_by('scheduled_date')
+        # Activity.farmer is the owner and leads the calendar indexes (see hot_queries)
+        return Activity.objects.filter(farmer=self.request.user)
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -100,15 +191,25 @@ class ActivityViewSet(viewsets.ModelViewSet):
         if self.action == 'retrieve':
             return ActivityDetailSerializer
         return ActivityCreateUpdateSerializer
+
+    def perform_create(self, serializer):
+        serializer.save(farmer=self.request.user)
     
-class WeatherRecordViewSet(viewsets.ModelViewSet):
+class WeatherRecordViewSet(ConditionalGetMixin, AutoRelatedMixin, viewsets.ModelViewSet):
+    cache_models = ('weatherrecord', 'field')
+    ordering = ('-recorded_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     filter_backends = [filters.SearchFilter]
     search_fields = [ 'location']
 
     def get_queryset(self):
-        return WeatherRecord.objects.filter(farmer=self.request.user).order_by('-recorded_at')
+        return WeatherRecord.objects.filter(farmer=self.request.user)
+
+    def get_ordering(self):
+        if self.action == 'rollups':
+            return ('bucket_start', 'id')
+        return self.ordering
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -119,15 +220,95 @@ class WeatherRecordViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(farmer=self.request.user)
+
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Accepts a JSON array or an NDJSON body of readings and upserts them in one go.
+        Returns a result per row: created, updated, duplicate (superseded later in
+        the same batch) or error.
+        """
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"detail": "Expected a non-empty JSON array or NDJSON body of readings."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(rows) > WEATHER_BULK_MAX_ROWS:
+            return Response(
+                {"detail": f"A bulk upload is limited to {WEATHER_BULK_MAX_ROWS} readings."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = ingest_weather_rows(request.user, rows)
+        summary = {key: 0 for key in ('created', 'updated', 'duplicate', 'error')}
+        for result in results:
+            summary[result['status']] += 1
+
+        if summary['error'] == len(results):
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif summary['error']:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({'summary': summary, 'results': results}, status=response_status)
+
+    @action(detail=False, methods=['get'], url_path='rollups')
+    def rollups(self, request):
+        """
+        Precomputed hourly, daily or monthly aggregates:
+        /api/weather/rollups/?bucket=day&field=<id>&start=<date>&end=<date>
+        """
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in dict(WeatherRollup.BUCKET_CHOICES):
+            raise ValidationError({'bucket': "Expected one of: hour, day, month."})
+
+        queryset = WeatherRollup.objects.filter(farmer=request.user, bucket=bucket)
+        queryset = filter_by_field_and_dates(queryset, request.query_params, 'bucket_start')
+        page = self.paginate_queryset(queryset)
+        serializer = WeatherRollupSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Streams the farmer's weather history as CSV or NDJSON:
+        /api/weather/export/?fmt=csv&field=<id>&start=<date>&end=<date>
+        (`fmt` rather than `format`, which DRF reserves for renderer selection.)
+        """
+        export_format = request.query_params.get('fmt', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'fmt': "Expected one of: csv, ndjson."})
+
+        queryset = WeatherRecord.objects.filter(farmer=request.user)
+        queryset = filter_by_field_and_dates(queryset, request.query_params, 'recorded_at')
+
+        response = StreamingHttpResponse(
+            stream_weather_export(queryset, export_format),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="weather-export.{export_format}"'
+        return response
     
-class SecureRouteViewSet(viewsets.ModelViewSet):
+class SecureRouteViewSet(ConditionalGetMixin, CachedResponseMixin, AutoRelatedMixin, viewsets.ModelViewSet):
+    cache_models = ('secureroute',)
+    ordering = ('-last_updated', '-id')
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['route_name', 'route_path_geojson', 'security_status', 'risk_notes']
+    authentication_classes = [CachedTokenAuthentication]
+    # ?search= ranked text search, ?bbox= and ?near=lat,lon&radius= spatial queries
+    filter_backends = [RankedSearchFilter, SecureRouteGeoFilter]
+    search_function = staticmethod(search_routes)
 
     def get_queryset(self):
-        return SecureRoute.objects.filter(farmer=self.request.user)
+        queryset = SecureRoute.objects.filter(farmer=self.request.user)
+        security_status = self.request.query_params.get('security_status')
+        if security_status:
+            # Status is a short choice, so it is matched exactly rather than searched
+            queryset = queryset.filter(security_status=security_status)
+        if self.action == 'list' and self.route_zoom() is None:
+            # The plain list shows no geometry, so don't read the large columns at all
+            queryset = queryset.defer('route_path_geojson', 'simplified_paths')
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -135,23 +316,191 @@ class SecureRouteViewSet(viewsets.ModelViewSet):
         if self.action == 'retrieve':
             return SecureRouteDetailSerializer
         return SecureRouteCreateUpdateSerializer
+
+    def route_zoom(self):
+        """
+        Precomputed zoom level requested with ?zoom=<0-22> or ?simplify=coarse|medium|fine,
+        or None for the full GeoJSON.
+        """
+        params = self.request.query_params
+        if params.get('zoom'):
+            try:
+                zoom = int(params['zoom'])
+            except ValueError:
+                zoom = -1
+            if not 0 <= zoom <= 22:
+                raise ValidationError({'zoom': "Expected a map zoom level between 0 and 22."})
+            return level_for_zoom(zoom)
+        if params.get('simplify'):
+            if params['simplify'] not in ROUTE_SIMPLIFY_PRESETS:
+                raise ValidationError({'simplify': f"Expected one of: {', '.join(ROUTE_SIMPLIFY_PRESETS)}."})
+            return ROUTE_SIMPLIFY_PRESETS[params['simplify']]
+        return None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'retrieve'):
+            context['route_zoom'] = self.route_zoom()
+        return context
     
     def perform_create(self, serializer):
         serializer.save(farmer=self.request.user)
 
-class ReviewSetView(viewsets.ModelViewSet):
-    queryset = Review.objects.all().order_by('-created_at')[:5]
+class ReviewSetView(AutoRelatedMixin, viewsets.ModelViewSet):
+    queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    
-    def get_queryset(self):
-        return SecureRoute.objects.filter(farmer=self.request.user)
+    ordering = ('-created_at', '-id')
 
     def perform_create(self, serializer):
         # Automatically set the 'farmer' to the logged-in user
         serializer.save(farmer=self.request.user)
 
-class PostViewSet(viewsets.ModelViewSet):
-    # Fetch latest 10 posts and their comments in one efficient query
-    queryset = Post.objects.all().order_by('-created_at').prefetch_related('comment_set')[:10]
-    serializer_class = PostSerializer
\ No newline at end of file
+class PostViewSet(AutoRelatedMixin, viewsets.ModelViewSet):
+    """
+    Community posts. ?search=<terms> ranks posts by title, tag and content
+    matches, adds a highlighted headline to each and tag facets to the page;
+    ?tag=<slug> keeps the posts with that tag.
+    """
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+    # created_at is a date, so the id breaks the many same-day ties
+    ordering = ('-id',)
+    filter_backends = [RankedSearchFilter]
+    search_function = staticmethod(search_posts)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tag = self.request.query_params.get('tag')
+        if self.action == 'list' and tag:
+            queryset = queryset.filter(tags__slug=tag)
+        return queryset
+
+    def search_terms(self):
+        return self.request.query_params.get(RankedSearchFilter.search_param, '').strip()
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self.search_terms():
+            return PostSearchSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'search_terms': self.search_terms()}
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if self.search_terms():
+            response.data['facets'] = post_tag_facets(self.filter_queryset(self.get_queryset()))
+        return response
+
+    @action(detail=True, methods=['post', 'delete'], url_path='like')
+    def like(self, request, pk=None):
+        """POST likes the post, DELETE takes the like back; returns the new count."""
+        post = generics.get_object_or_404(Post, pk=pk)
+        if request.method == 'POST':
+            post.likes.add(request.user)
+        else:
+            post.likes.remove(request.user)
+        post.refresh_from_db(fields=['like_count'])
+        return Response({'liked': request.method == 'POST', 'like_count': post.like_count})
+
+    @action(detail=True, methods=['get', 'post'], url_path='comments')
+    def comments(self, request, pk=None):
+        """
+        GET: the threaded discussion, a page of top-level comments with their
+        replies nested: ?after=<comment id>&page_size=20&depth=<levels shown>
+        POST: adds a comment, or a reply when "parent" is given.
+        """
+        post = generics.get_object_or_404(Post, pk=pk)
+        if request.method == 'POST':
+            serializer = CommentThreadSerializer(data=request.data, context={'request': request, 'post': post})
+            serializer.is_valid(raise_exception=True)
+            serializer.save(post=post, author=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        params = request.query_params
+        try:
+            after = int(params['after']) if params.get('after') else None
+            page_size = min(int(params.get('page_size', THREAD_PAGE_SIZE)), THREAD_MAX_PAGE_SIZE)
+            depth = int(params['depth']) if params.get('depth') else None
+        except ValueError:
+            raise ValidationError({'detail': "after, page_size and depth must be integers."})
+        if page_size < 1 or (depth is not None and depth < 1):
+            raise ValidationError({'detail': "page_size and depth must be positive."})
+
+        roots, next_after = load_thread(post.pk, after=after, limit=page_size, max_depth=depth)
+        next_url = None
+        if next_after is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'after', next_after)
+        return Response({
+            'next': next_url,
+            'results': CommentThreadSerializer(roots, many=True, context={'request': request, 'post': post}).data,
+        })
+
+class SyncView(APIView):
+    """
+    Delta sync for offline clients: GET /api/sync/?since=<cursor>
+    Returns rows changed and ids deleted since the cursor across fields, crops,
+    activities, weather and routes, plus the cursor to send next time.
+    Without a cursor (or with one older than the tombstone retention) the
+    response has reset=true and carries a full snapshot.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = decode_cursor(since)
+            except (ValueError, OverflowError):
+                raise ValidationError({'since': "Invalid sync cursor."})
+        return Response(build_sync_payload(request.user, since or None))
+
+class BatchView(APIView):
+    """
+    Replays queued offline mutations in one round trip: POST /api/batch/
+    {"atomic": false, "operations": [{"key": "<uuid>", "op": "create|update|delete",
+    "resource": "activities|crops|weather", "id": 12, "data": {...}}]}
+    Each result carries the HTTP status the single-item call would have returned.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        payload = request.data
+        operations = payload.get('operations') if isinstance(payload, dict) else payload
+        if not isinstance(operations, list) or not operations:
+            raise ValidationError({'operations': "Expected a non-empty list of operations."})
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            raise ValidationError({'operations': f"A batch is limited to {BATCH_MAX_OPERATIONS} operations."})
+
+        atomic = isinstance(payload, dict) and bool(payload.get('atomic'))
+        succeeded, results = apply_batch(request, operations, atomic=atomic)
+        if succeeded:
+            response_status = status.HTTP_200_OK
+        elif atomic:
+            response_status = status.HTTP_409_CONFLICT
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS
+        return Response({'results': results}, status=response_status)
+
+class MetricsView(APIView):
+    """
+    Request metrics of this worker process in the Prometheus text format:
+    GET /api/metrics/ (staff only).
+    """
+    permission_classes = [permissions.IsAdminUser]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+class DashboardView(APIView):
+    """
+    The farmer's home-screen summary in one call: GET /api/dashboard/
+    Fields with crop counts and latest weather, upcoming activities, route
+    counts by security status and crops by status; cached until any changes.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_dashboard(request.user))
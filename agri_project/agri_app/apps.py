@@ -7,3 +7,4 @@ class AgriAppConfig(AppConfig):
 
     def ready(self):
         import agri_app.signals
+        import agri_app.checks
@@ -0,0 +1,134 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException, AuthenticationFailed, ValidationError
+from rest_framework.request import Request
+
+from .api_views import filter_by_field_and_dates
+from .authentication import CachedTokenAuthentication
+from .models import (
+    Field, Crop, Activity, WeatherRecord, WeatherRollup, SecureRoute, ACTIVE_ACTIVITY_STATUSES,
+)
+from .pagination import KeysetCursorPagination
+from .related import with_related
+from .serializers import (
+    CropListSerializer, ActivityListSerializer, WeatherRecordListSerializer, WeatherRollupSerializer,
+    SecureRouteListSerializer,
+)
+
+# Native async variants of the read-heavy API endpoints for ASGI deployments,
+# where a slow query suspends its own request instead of holding a worker.
+# DRF views are synchronous, so these are plain Django views reusing the API's
+# serializers, authentication, filters and keyset cursor pagination.
+
+
+async def _authenticated_user(request):
+    """
+    The farmer behind the API token, else the session's; None if neither.
+    An invalid or revoked token raises AuthenticationFailed, as in DRF.
+    """
+    result = await sync_to_async(CachedTokenAuthentication().authenticate)(request)
+    if result is not None:
+        return result[0]
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def _unauthorized(detail):
+    response = JsonResponse({'detail': detail}, status=401)
+    response['WWW-Authenticate'] = CachedTokenAuthentication().authenticate_header(None)
+    return response
+
+
+def async_api_view(view):
+    """GET-only, authenticated async endpoint; view(request, user) returns the JSON data."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        try:
+            user = await _authenticated_user(request)
+        except AuthenticationFailed as exc:
+            return _unauthorized(exc.detail)
+        if user is None:
+            return _unauthorized("Authentication credentials were not provided.")
+        try:
+            return JsonResponse(await view(request, user, *args, **kwargs))
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            return JsonResponse(detail, status=exc.status_code, safe=False)
+    return wrapper
+
+
+async def _page(request, queryset, serializer_class, ordering):
+    """{'next', 'previous', 'results'}: one keyset page, with no COUNT(*), like the sync lists."""
+    paginator = KeysetCursorPagination()
+    paginator.ordering = ordering
+    page = paginator.page_queryset(with_related(queryset, serializer_class), Request(request))
+    results = paginator.set_page([row async for row in page.aiterator(chunk_size=paginator.page_size + 1)])
+    return {
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': serializer_class(results, many=True).data,
+    }
+
+
+@async_api_view
+async def weather_list(request, user):
+    queryset = filter_by_field_and_dates(WeatherRecord.objects.filter(farmer=user), request.GET, 'recorded_at')
+    return await _page(request, queryset, WeatherRecordListSerializer, ('-recorded_at', '-id'))
+
+
+@async_api_view
+async def weather_rollups(request, user):
+    bucket = request.GET.get('bucket', 'day')
+    if bucket not in dict(WeatherRollup.BUCKET_CHOICES):
+        raise ValidationError({'bucket': "Expected one of: hour, day, month."})
+    queryset = WeatherRollup.objects.filter(farmer=user, bucket=bucket)
+    queryset = filter_by_field_and_dates(queryset, request.GET, 'bucket_start')
+    return await _page(request, queryset, WeatherRollupSerializer, ('bucket_start', 'id'))
+
+
+@async_api_view
+async def crop_list(request, user):
+    queryset = Crop.objects.filter(fields__farmer=user)
+    return await _page(request, queryset, CropListSerializer, ('-planted_on', '-id'))
+
+
+@async_api_view
+async def activity_list(request, user):
+    queryset = Activity.objects.filter(farmer=user)
+    return await _page(request, queryset, ActivityListSerializer, ('scheduled_date', 'id'))
+
+
+@async_api_view
+async def route_list(request, user):
+    queryset = SecureRoute.objects.filter(farmer=user).defer('route_path_geojson', 'simplified_paths')
+    security_status = request.GET.get('security_status')
+    if security_status:
+        queryset = queryset.filter(security_status=security_status)
+    return await _page(request, queryset, SecureRouteListSerializer, ('-last_updated', '-id'))
+
+
+@async_api_view
+async def overview(request, user):
+    """Headline numbers for the app's home screen."""
+    # Awaited together; Django still runs ORM calls one at a time on its
+    # database thread, but the event loop is free for other requests meanwhile
+    latest = (
+        WeatherRecord.objects.filter(farmer=user).order_by('-recorded_at', '-id')
+        .values('recorded_at', 'temperature', 'humidity', 'rainfall', 'field_id')
+    )
+    fields, crops, open_activities, red_routes, latest_weather = await asyncio.gather(
+        Field.objects.filter(farmer=user).acount(),
+        Crop.objects.filter(fields__farmer=user).acount(),
+        Activity.objects.filter(farmer=user, status__in=ACTIVE_ACTIVITY_STATUSES).acount(),
+        SecureRoute.objects.filter(farmer=user, security_status='red').acount(),
+        latest.afirst(),
+    )
+    return {
+        'fields': fields, 'crops': crops, 'open_activities': open_activities,
+        'red_routes': red_routes, 'latest_weather': latest_weather,
+    }
@@ -0,0 +1,115 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .cache import _new_version
+
+# Token lookups go through the shared Django cache, which holds only the
+# token's user id, whether the user is active, and a version minted each time
+# the entry is rebuilt. Signals delete that entry when the token or its user
+# changes, so every process sees a revocation on its next request. Each
+# process also keeps the loaded user in a small LRU under that version, and
+# hands every request its own copy of it.
+
+
+class LRUCache:
+    """A thread-safe, size-bounded mapping whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_tokens = LRUCache(settings.TOKEN_AUTH_LOCAL_SIZE, settings.TOKEN_AUTH_LOCAL_TTL)
+
+
+def _token_cache_key(key):
+    # Hashed, so the shared cache never holds usable credentials
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    cache_key = _token_cache_key(key)
+
+    def forget():
+        local_tokens.delete(cache_key)
+        cache.delete(cache_key)
+
+    forget()
+    # Cleared again after commit, in case a request re-cached the old row meanwhile
+    transaction.on_commit(forget)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in TokenAuthentication that remembers which token belongs to which
+    user instead of querying Token and Farmer on every request.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = _token_cache_key(key)
+        entry = cache.get(cache_key)
+        if entry is None:
+            token = self._load_token(key)
+            entry = {'user_id': token.user_id, 'is_active': token.user.is_active, 'version': _new_version()}
+            cache.set(cache_key, entry, settings.TOKEN_AUTH_CACHE_TIMEOUT)
+            local_tokens.set(cache_key, (entry['version'], token.user))
+
+        if not entry['is_active']:
+            raise AuthenticationFailed('User inactive or deleted.')
+
+        local = local_tokens.get(cache_key)
+        if local is None or local[0] != entry['version']:
+            user = get_user_model().objects.filter(pk=entry['user_id']).first()
+            if user is None:
+                raise AuthenticationFailed('User inactive or deleted.')
+            local = (entry['version'], user)
+            local_tokens.set(cache_key, local)
+
+        # A copy per request, so one request's changes to request.user never reach another
+        user = copy.copy(local[1])
+        return (user, self.get_model()(key=key, user=user))
+
+    def _load_token(self, key):
+        try:
+            return self.get_model().objects.select_related('user').get(key=key)
+        except self.get_model().DoesNotExist:
+            raise AuthenticationFailed('Invalid token.')
@@ -1,21 +1,48 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models.lookups import Exact
+from django.db.models.functions import Lower
 
 Farmer = get_user_model()
 
 class EmailOrUsernameBackend(ModelBackend):
+    """
+    Signs in with a username or an email address, ignoring case. It is the
+    only backend (permissions come from ModelBackend), so a failed attempt
+    costs one query and one password hash whether or not the user exists.
+    """
     def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(Farmer.USERNAME_FIELD)
         if username is None or password is None:
             return None
 
-        try:
-            user = Farmer.objects.get(
-                Q(username=username) | Q(email=username)
-            )
-        except Farmer.DoesNotExist:
+        user = self.get_user_by_identifier(username)
+        if user is not None and user.has_usable_password():
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
             return None
+        # Hash anyway, so unknown or ambiguous identifiers and accounts without a
+        # password (check_password returns at once for those) take as long as wrong passwords
+        Farmer().set_password(password)
+        return None
 
-        if user.check_password(password) and user.is_active:
-            return user
+    def get_user_by_identifier(self, identifier):
+        """
+        One query: a UNION of equality lookups on the lowercase username and
+        email expression indexes, so each side is an index scan (an OR of the
+        two columns tends to end up scanning the table).
+        """
+        normalized = identifier.lower()
+        by_username = Farmer.objects.filter(Exact(Lower('username'), normalized))
+        by_email = Farmer.objects.filter(Exact(Lower('email'), normalized))
+        matches = list(by_username.union(by_email)[:3])
+        if len(matches) == 1:
+            return matches[0]
+        # Only an exact match settles names that differ just in case,
+        # or a username that is someone else's email
+        for field in ('username', 'email'):
+            exact = [user for user in matches if getattr(user, field) == identifier]
+            if len(exact) == 1:
+                return exact[0]
         return None
@@ -0,0 +1,148 @@
+from collections import namedtuple
+
+from django.db import transaction
+from rest_framework import status
+
+from .models import Activity, Crop, Farmer, WeatherRecord, IdempotencyKey
+from .serializers import (
+    ActivityCreateUpdateSerializer, CropCreateUpdateSerializer,
+    WeatherRecordCreateUpdateSerializer,
+)
+
+BatchResource = namedtuple('BatchResource', ['queryset', 'serializer_class', 'owner_on_create'])
+
+# Resources the mobile app can mutate while offline. The querysets mirror the
+# scoping of the matching viewsets, so an operation can only reach its own rows.
+BATCH_RESOURCES = {
+    'activities': BatchResource(
+        lambda user: Activity.objects.filter(farmer=user), ActivityCreateUpdateSerializer, True,
+    ),
+    'crops': BatchResource(
+        lambda user: Crop.objects.filter(fields__farmer=user), CropCreateUpdateSerializer, False,
+    ),
+    'weather': BatchResource(
+        lambda user: WeatherRecord.objects.filter(farmer=user), WeatherRecordCreateUpdateSerializer, True,
+    ),
+}
+
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+BATCH_MAX_OPERATIONS = 200
+
+
+class OperationFailed(Exception):
+    def __init__(self, status_code, errors):
+        super().__init__(errors)
+        self.status_code = status_code
+        self.errors = errors
+
+
+def _key_of(operation):
+    return operation.get('key') if isinstance(operation, dict) else None
+
+
+def _check_operation(operation):
+    if not isinstance(operation, dict):
+        raise OperationFailed(status.HTTP_400_BAD_REQUEST, {'detail': "Each operation must be an object."})
+    errors = {}
+    key = operation.get('key')
+    if not isinstance(key, str) or not key or len(key) > 64:
+        errors['key'] = "A client-generated idempotency key (1-64 characters) is required."
+    if operation.get('resource') not in BATCH_RESOURCES:
+        errors['resource'] = f"Expected one of: {', '.join(BATCH_RESOURCES)}."
+    if operation.get('op') not in BATCH_OPERATIONS:
+        errors['op'] = f"Expected one of: {', '.join(BATCH_OPERATIONS)}."
+    elif operation['op'] != 'create' and not isinstance(operation.get('id'), int):
+        errors['id'] = "Updates and deletes need the id of the row."
+    if errors:
+        raise OperationFailed(status.HTTP_400_BAD_REQUEST, errors)
+
+
+def _apply(operation, request):
+    """Applies one operation and returns (status code, response body)."""
+    resource = BATCH_RESOURCES[operation['resource']]
+    user = request.user
+    context = {'request': request}
+
+    instance = None
+    if operation['op'] != 'create':
+        instance = resource.queryset(user).filter(pk=operation['id']).first()
+        if instance is None:
+            raise OperationFailed(status.HTTP_404_NOT_FOUND, {'detail': "Not found."})
+
+    if operation['op'] == 'delete':
+        instance.delete()
+        return status.HTTP_204_NO_CONTENT, None
+
+    serializer = resource.serializer_class(
+        instance, data=operation.get('data') or {}, partial=instance is not None, context=context
+    )
+    if not serializer.is_valid():
+        raise OperationFailed(status.HTTP_400_BAD_REQUEST, serializer.errors)
+
+    if instance is None and resource.owner_on_create:
+        instance = serializer.save(farmer=user)
+    else:
+        instance = serializer.save()
+    body = dict(serializer.data, id=instance.pk)
+    return (status.HTTP_200_OK if operation['op'] == 'update' else status.HTTP_201_CREATED), body
+
+
+def apply_batch(request, operations, atomic=False):
+    """
+    Applies a list of offline operations in one transaction.
+
+    Every operation runs in its own savepoint, so a failing one is rolled back
+    on its own; with atomic=True the first failure rolls back the whole batch.
+    Operations whose key was already applied return the stored result with
+    replayed=True. Returns (all succeeded, results in input order).
+    """
+    keys = [key for key in map(_key_of, operations) if isinstance(key, str)]
+    results = []
+    new_keys = {}
+    failed = False
+    with transaction.atomic():
+        # Replays of one batch often race on flaky links. Holding the farmer's
+        # row serializes them, so the second sees the keys the first stored
+        # instead of applying every operation again.
+        list(Farmer.objects.select_for_update().filter(pk=request.user.pk).values_list('pk', flat=True))
+        stored = {
+            record.key: record
+            for record in IdempotencyKey.objects.filter(farmer=request.user, key__in=keys)
+        }
+
+        for operation in operations:
+            if failed and atomic:
+                results.append({'key': _key_of(operation), 'status': None, 'detail': "Not applied."})
+                continue
+            try:
+                _check_operation(operation)
+                key = operation['key']
+                previous = stored.get(key) or new_keys.get(key)
+                if previous is not None:
+                    results.append({
+                        'key': key, 'status': previous.status_code,
+                        'data': previous.response, 'replayed': True,
+                    })
+                    continue
+                with transaction.atomic():
+                    status_code, body = _apply(operation, request)
+            except OperationFailed as exc:
+                failed = True
+                results.append({'key': _key_of(operation), 'status': exc.status_code, 'errors': exc.errors})
+                continue
+
+            new_keys[key] = IdempotencyKey(
+                farmer=request.user, key=key, status_code=status_code, response=body
+            )
+            results.append({'key': key, 'status': status_code, 'data': body})
+
+        if failed and atomic:
+            transaction.set_rollback(True)
+            for result in results:
+                if 'data' in result and not result.get('replayed'):
+                    result['rolled_back'] = True
+        else:
+            # Only successful operations are remembered, so a failed one can be fixed and retried
+            IdempotencyKey.objects.bulk_create(new_keys.values())
+
+    return not failed, results
@@ -0,0 +1,340 @@
+import asyncio
+import json
+import math
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import connection, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .cache import bump_versions
+from .middleware import QueryRecorder
+from .models import Field, Crop, Activity, WeatherRecord, SecureRoute
+
+# kind is 'api' (token-authenticated DRF client) or 'web' (logged-in session).
+# path and data are functions of the BenchmarkContext.
+Benchmark = namedtuple('Benchmark', ['name', 'kind', 'method', 'path', 'data'])
+BenchmarkContext = namedtuple('BenchmarkContext', ['farmer', 'field', 'crop', 'activity', 'weather', 'route'])
+
+BENCHMARKS = [
+    # REST API
+    Benchmark('api.field-list', 'api', 'get', lambda c: reverse('field-list'), None),
+    Benchmark('api.crop-list', 'api', 'get', lambda c: reverse('crop-list'), None),
+    Benchmark('api.crop-detail', 'api', 'get', lambda c: reverse('crop-detail', args=[c.crop.pk]), None),
+    Benchmark('api.crop-search', 'api', 'get', lambda c: reverse('crop-list') + '?search=Maize', None),
+    Benchmark('api.crop-indicators', 'api', 'get', lambda c: reverse('crop-indicators'), None),
+    Benchmark('api.activity-list', 'api', 'get', lambda c: reverse('activity-list'), None),
+    Benchmark('api.activity-detail', 'api', 'get',
+              lambda c: reverse('activity-detail', args=[c.activity.pk]), None),
+    Benchmark('api.weather-list', 'api', 'get', lambda c: reverse('weather-record-list'), None),
+    Benchmark('api.weather-detail', 'api', 'get',
+              lambda c: reverse('weather-record-detail', args=[c.weather.pk]), None),
+    Benchmark('api.weather-rollups', 'api', 'get',
+              lambda c: reverse('weather-record-rollups') + f'?bucket=day&field={c.field.pk}', None),
+    Benchmark('api.route-list', 'api', 'get', lambda c: reverse('secure-route-list'), None),
+    Benchmark('api.route-search', 'api', 'get', lambda c: reverse('secure-route-list') + '?search=road', None),
+    Benchmark('api.route-near', 'api', 'get', lambda c: reverse('secure-route-list') + '?near=-1.68,29.23&radius=50',
+              None),
+    Benchmark('api.sync', 'api', 'get', lambda c: reverse('sync'), None),
+    Benchmark('api.dashboard', 'api', 'get', lambda c: reverse('dashboard'), None),
+    Benchmark('api.crop-create', 'api', 'post', lambda c: reverse('crop-list'),
+              lambda c: {'name': 'Bench maize', 'category': 'Cereal', 'fields': c.field.pk, 'status': 'planted'}),
+    Benchmark('api.activity-create', 'api', 'post', lambda c: reverse('activity-list'),
+              lambda c: {'title': 'Bench weeding', 'field': c.field.pk, 'crop': c.crop.pk,
+                         'scheduled_date': '2030-01-01'}),
+    Benchmark('api.weather-create', 'api', 'post', lambda c: reverse('weather-record-list'),
+              lambda c: {'field': c.field.pk, 'recorded_at': '2099-01-01T00:00:00Z',
+                         'temperature': 21.5, 'humidity': 70, 'rainfall': 0}),
+    # Web pages
+    Benchmark('web.profile', 'web', 'get', lambda c: reverse('profile'), None),
+    Benchmark('web.field-list', 'web', 'get', lambda c: reverse('field_list'), None),
+    Benchmark('web.field-detail', 'web', 'get', lambda c: reverse('field_detail', args=[c.field.pk]), None),
+    Benchmark('web.crop-list', 'web', 'get', lambda c: reverse('crop_list'), None),
+    Benchmark('web.crop-detail', 'web', 'get', lambda c: reverse('crop_detail', args=[c.crop.pk]), None),
+    Benchmark('web.activity-list', 'web', 'get', lambda c: reverse('activity_list'), None),
+    Benchmark('web.activity-search', 'web', 'get', lambda c: reverse('activity_list') + '?status=scheduled', None),
+    Benchmark('web.weather-list', 'web', 'get', lambda c: reverse('weather_list'), None),
+    Benchmark('web.route-list', 'web', 'get', lambda c: reverse('secure_route_list'), None),
+    Benchmark('web.crop-create', 'web', 'post', lambda c: reverse('crop_create'),
+              lambda c: {'fields': c.field.pk, 'name': 'Bench maize', 'category': 'Cereal',
+                         'planted_on': '2030-01-01', 'status': 'planted'}),
+]
+
+# Every per-farmer cache the views read, bumped before each run unless measuring warm caches
+CACHED_MODELS = ('field', 'crop', 'activity', 'weatherrecord', 'secureroute')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def build_context(farmer):
+    fields = Field.objects.filter(farmer=farmer)
+    context = BenchmarkContext(
+        farmer=farmer,
+        field=fields.order_by('id').first(),
+        crop=Crop.objects.filter(fields__in=fields).order_by('id').first(),
+        activity=Activity.objects.filter(farmer=farmer).order_by('id').first(),
+        weather=WeatherRecord.objects.filter(farmer=farmer).order_by('id').first(),
+        route=SecureRoute.objects.filter(farmer=farmer).order_by('id').first(),
+    )
+    missing = [name for name, value in context._asdict().items() if value is None]
+    if missing:
+        raise BenchmarkError(f"Farmer {farmer.username} has no {', '.join(missing)}; run generate_farm_data first.")
+    return context
+
+
+def dataset_size(farmer):
+    return {
+        'fields': Field.objects.filter(farmer=farmer).count(),
+        'crops': Crop.objects.filter(fields__farmer=farmer).count(),
+        'activities': Activity.objects.filter(farmer=farmer).count(),
+        'weather': WeatherRecord.objects.filter(farmer=farmer).count(),
+        'routes': SecureRoute.objects.filter(farmer=farmer).count(),
+    }
+
+
+def _clients(farmer):
+    hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host not in ('*', '')]
+    host = hosts[0] if hosts else 'localhost'
+    api = APIClient(HTTP_HOST=host)
+    api.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get_or_create(user=farmer)[0].key}')
+    web = Client(HTTP_HOST=host)
+    web.force_login(farmer)
+    return {'api': api, 'web': web}
+
+
+def run_benchmarks(farmer, benchmarks=BENCHMARKS, repeat=20, warmup=2, warm_cache=False):
+    """
+    Times each benchmark `repeat` times after `warmup` untimed runs.
+    Every run happens in a transaction that is rolled back, so create
+    benchmarks see the same data each time and leave nothing behind.
+    Returns {name: {'p50_ms', 'p95_ms', 'queries'}}.
+    """
+    context = build_context(farmer)
+    clients = _clients(farmer)
+    results = {}
+    for benchmark in benchmarks:
+        client = clients[benchmark.kind]
+        path = benchmark.path(context)
+        data = benchmark.data(context) if benchmark.data else None
+        extra = {'format': 'json'} if benchmark.kind == 'api' and data is not None else {}
+
+        timings, queries = [], []
+        for run in range(warmup + repeat):
+            if not warm_cache:
+                bump_versions(farmer.pk, *CACHED_MODELS)
+            recorder = QueryRecorder()
+            with transaction.atomic():
+                with connection.execute_wrapper(recorder):
+                    started = time.perf_counter()
+                    response = getattr(client, benchmark.method)(path, data, secure=True, **extra)
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            if response.status_code >= 400:
+                raise BenchmarkError(f"{benchmark.name}: {benchmark.method.upper()} {path} "
+                                     f"returned {response.status_code}")
+            if run >= warmup:
+                timings.append(elapsed * 1000)
+                queries.append(recorder.count)
+
+        results[benchmark.name] = {
+            'p50_ms': round(percentile(timings, 0.50), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': max(queries),
+        }
+    return results
+
+
+def _sign_in(attempts):
+    """Runs in a worker thread; returns (outcome, succeeded, ms) per attempt."""
+    try:
+        results = []
+        for outcome, identifier, password in attempts:
+            started = time.perf_counter()
+            user = authenticate(None, username=identifier, password=password)
+            results.append((outcome, user is not None, (time.perf_counter() - started) * 1000))
+        return results
+    finally:
+        # Each thread opened its own connection
+        connection.close()
+
+
+def run_login_benchmark(identifiers, password, attempts=200, concurrency=8):
+    """
+    Signs in `attempts` times from `concurrency` threads, cycling through
+    correct passwords, wrong passwords and unknown users. Returns the overall
+    logins per second and, per outcome, the p50/p95 latency and how many got
+    the expected answer. Close latencies across outcomes mean a failed login
+    does not reveal whether the account exists.
+    """
+    cases = []
+    for index in range(attempts):
+        identifier = identifiers[index % len(identifiers)]
+        kind = index % 3
+        if kind == 0:
+            cases.append(('success', identifier, password))
+        elif kind == 1:
+            cases.append(('wrong-password', identifier, password + '-wrong'))
+        else:
+            cases.append(('unknown-user', f'nobody-{index}@example.com', password))
+
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        authenticate(None, username=identifiers[0], password=password)
+
+    chunks = [cases[start::concurrency] for start in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = [result for chunk in executor.map(_sign_in, chunks) for result in chunk]
+    elapsed = time.perf_counter() - started
+
+    outcomes = {}
+    for outcome, succeeded, ms in results:
+        entry = outcomes.setdefault(outcome, {'timings': [], 'expected': 0})
+        entry['timings'].append(ms)
+        entry['expected'] += succeeded == (outcome == 'success')
+    return {
+        'logins_per_s': round(len(results) / elapsed, 1),
+        'queries_per_login': recorder.count,
+        'outcomes': {
+            outcome: {
+                'count': len(entry['timings']),
+                'expected': entry['expected'],
+                'p50_ms': round(percentile(entry['timings'], 0.50), 2),
+                'p95_ms': round(percentile(entry['timings'], 0.95), 2),
+            }
+            for outcome, entry in outcomes.items()
+        },
+    }
+
+
+# (name, sync URL name, async URL name, query string) compared by run_stack_comparison
+STACK_PAIRS = [
+    ('weather-list', 'weather-record-list', 'async-weather-list', ''),
+    ('weather-rollups', 'weather-record-rollups', 'async-weather-rollups', '?bucket=day'),
+    ('crop-list', 'crop-list', 'async-crop-list', ''),
+    ('activity-list', 'activity-list', 'async-activity-list', ''),
+    ('route-list', 'secure-route-list', 'async-secure-route-list', ''),
+]
+
+
+def _stack_stats(timings, elapsed):
+    return {
+        'requests_per_s': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 0.50), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+    }
+
+
+def _sync_requests(farmer, path, headers, count):
+    """Runs in a worker thread, like one WSGI worker; returns the latencies."""
+    client = Client()
+    timings = []
+    try:
+        for _ in range(count):
+            # Measure the database path, not the response cache
+            bump_versions(farmer.pk, *CACHED_MODELS)
+            started = time.perf_counter()
+            response = client.get(path, headers=headers, secure=True)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise BenchmarkError(f"GET {path} returned {response.status_code}")
+        return timings
+    finally:
+        connection.close()
+
+
+async def _async_requests(path, headers, count, concurrency):
+    client = AsyncClient()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers, secure=True)
+            if response.status_code != 200:
+                raise BenchmarkError(f"GET {path} returned {response.status_code}")
+            return (time.perf_counter() - started) * 1000
+
+    return await asyncio.gather(*(one() for _ in range(count)))
+
+
+def run_stack_comparison(farmer, pairs=STACK_PAIRS, requests=100, concurrency=16):
+    """
+    Serves `requests` calls per endpoint with `concurrency` in flight: through
+    the sync views from a pool of threads (WSGI workers) and through the async
+    views on one event loop (ASGI). Returns
+    {name: {'sync': stats, 'async': stats}} with requests/s and p50/p95 ms.
+    """
+    headers = {'authorization': f'Token {Token.objects.get_or_create(user=farmer)[0].key}'}
+    per_thread = [requests // concurrency + (index < requests % concurrency) for index in range(concurrency)]
+    results = {}
+    # AsyncClient always sends Host: testserver
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for name, sync_name, async_name, query in pairs:
+            results[name] = _compare_stacks(
+                farmer, reverse(sync_name) + query, reverse(async_name) + query, headers, per_thread,
+                requests, concurrency,
+            )
+    return results
+
+
+def _compare_stacks(farmer, sync_path, async_path, headers, per_thread, requests, concurrency):
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        chunks = executor.map(lambda count: _sync_requests(farmer, sync_path, headers, count), per_thread)
+        sync_timings = [timing for chunk in chunks for timing in chunk]
+    sync_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    async_timings = asyncio.run(_async_requests(async_path, headers, requests, concurrency))
+    async_elapsed = time.perf_counter() - started
+
+    return {
+        'sync': _stack_stats(sync_timings, sync_elapsed),
+        'async': _stack_stats(async_timings, async_elapsed),
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25, noise_ms=5.0):
+    """
+    Regressions against a saved baseline: more queries than before, or a p95
+    more than `tolerance` slower (ignoring differences below noise_ms).
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        if result['queries'] > previous['queries']:
+            regressions.append(f"{name}: {result['queries']} queries (baseline {previous['queries']})")
+        slower = result['p95_ms'] - previous['p95_ms']
+        if slower > noise_ms and result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms (baseline {previous['p95_ms']} ms)")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, results, dataset):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as baseline_file:
+        json.dump({'dataset': dataset, 'results': results}, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
@@ -0,0 +1,156 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+# Per-farmer data versions. Every cached entry's key embeds the current version
+# of each model it was built from; bumping a version makes those keys unreachable,
+# and the orphaned entries simply expire.
+
+
+def _version_key(farmer_id, model_name):
+    return f'farmer:{farmer_id}:version:{model_name}'
+
+
+def _new_version():
+    # Time-based rather than a counter, so a version lost to eviction is never reused
+    return format(time.time_ns(), 'x')
+
+
+def get_versions(farmer_id, model_names):
+    keys = [_version_key(farmer_id, name) for name in model_names]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(farmer_id, *model_names):
+    """Invalidates every cached entry of the farmer that depends on these models."""
+    def bump():
+        version = _new_version()
+        cache.set_many({_version_key(farmer_id, name): version for name in model_names}, timeout=None)
+
+    bump()
+    # Bumped again after commit: a read between the first bump and the commit
+    # would otherwise cache the old rows under the new version
+    transaction.on_commit(bump)
+
+
+def _delete_on_commit(keys):
+    cache.delete_many(keys)
+    # Deleted again after commit, for the same reason as bump_versions
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def data_version(farmer_id, model_names):
+    """One string that changes whenever any of these models of the farmer changes."""
+    return '.'.join(get_versions(farmer_id, model_names))
+
+
+def farmer_cache_key(farmer_id, model_names, *parts):
+    versions = data_version(farmer_id, model_names)
+    digest = hashlib.md5(':'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+    return f'farmer:{farmer_id}:{versions}:{digest}'
+
+
+def cached_for_farmer(farmer_id, model_names, parts, compute):
+    """Returns compute() from the cache, keyed on the parts and the models' current versions."""
+    key = farmer_cache_key(farmer_id, model_names, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, settings.FARMER_CACHE_TIMEOUT)
+    return value
+
+
+class FarmerCacheMixin:
+    """
+    For the farmer-scoped list and detail pages. cache_models names the models
+    (by model_name) the page is built from; ListViews return
+    self.cached_list(queryset) from get_queryset, DetailViews are cached as is.
+    """
+    cache_models = ()
+
+    def cached_list(self, queryset):
+        parts = (type(self).__name__, 'list', self.request.GET.urlencode())
+        return cached_for_farmer(self.request.user.pk, self.cache_models, parts, lambda: list(queryset))
+
+    def get_object(self, queryset=None):
+        load = super().get_object
+        parts = (type(self).__name__, 'object', self.kwargs.get(self.pk_url_kwarg))
+        return cached_for_farmer(self.request.user.pk, self.cache_models, parts, lambda: load(queryset))
+
+
+class CachedResponseMixin:
+    """
+    Serves list and retrieve responses of a farmer-scoped viewset from the cache.
+    The serialized data is stored, so every renderer shares one entry.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response('list', super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response('retrieve', super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, action, handler, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = farmer_cache_key(
+            request.user.pk, self.cache_models, type(self).__name__, action, request.get_full_path()
+        )
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.FARMER_CACHE_TIMEOUT)
+        return response
+
+
+#-------------------------
+# Home page
+#-------------------------
+HOME_CONTENT_KEY = 'home:content'
+# How long a user's "can review" answer is reused; it only changes with
+# their own reviews (which clear it) or with time
+REVIEW_ELIGIBILITY_TTL = 60 * 60
+
+
+def _review_eligibility_key(farmer_id):
+    return f'home:can_review:{farmer_id}'
+
+
+def get_home_content(compute):
+    """The public part of the home page (featured post, latest reviews), cached until one changes."""
+    content = cache.get(HOME_CONTENT_KEY)
+    if content is None:
+        content = compute()
+        cache.set(HOME_CONTENT_KEY, content, settings.FARMER_CACHE_TIMEOUT)
+    return content
+
+
+def invalidate_home_content():
+    _delete_on_commit([HOME_CONTENT_KEY])
+
+
+def get_review_eligibility(farmer_id, compute):
+    key = _review_eligibility_key(farmer_id)
+    eligible = cache.get(key)
+    if eligible is None:
+        eligible = compute()
+        cache.set(key, eligible, REVIEW_ELIGIBILITY_TTL)
+    return eligible
+
+
+def invalidate_review_eligibility(farmer_id):
+    _delete_on_commit([_review_eligibility_key(farmer_id)])
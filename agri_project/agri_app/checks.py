@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends whose entries only the process that wrote them can see
+PROCESS_LOCAL_CACHES = {'django.core.cache.backends.locmem.LocMemCache'}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Per-farmer versions and token revocations only reach every worker through a shared cache."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        "The default cache is local to each process, so a change in one worker leaves cached "
+        "responses, dashboards and token lookups stale in the others.",
+        hint="Set REDIS_URL, or use the database cache (python manage.py createcachetable).",
+        id='agri_app.W001',
+    )]
@@ -0,0 +1,49 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_versions
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified for list and retrieve, so polling clients get a
+    304 Not Modified while nothing changed.
+
+    The validators are the farmer's data versions of cache_models (see
+    agri_app.cache), which every save and delete of those models bumps, so
+    deciding on a 304 costs no query and deletions are never missed.
+    cache_models must name every model whose changes show in the response.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        versions = get_versions(request.user.pk, self.cache_models)
+        # The same rows render differently per URL (filters, zoom) and per format
+        fingerprint = repr((
+            request.user.pk, versions, self.action, request.get_full_path(), request.accepted_renderer.format,
+        ))
+        etag = quote_etag(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest())
+        # Versions are nanosecond timestamps of the latest change (see cache._new_version)
+        last_modified = max(int(version, 16) for version in versions) // 10 ** 9 if versions else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Per-user data: browsers may keep it but must revalidate, shared caches must not
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
@@ -0,0 +1,28 @@
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count_per_post(queryset):
+    counts = queryset.filter(post=OuterRef('pk')).order_by().values('post').annotate(total=Count('*'))
+    return Coalesce(Subquery(counts.values('total')), Value(0))
+
+
+def recount_post_counters(posts):
+    """
+    Recomputes like_count and comment_count of the given posts with a single
+    UPDATE. Works on historical models too, so migrations can use it.
+    Returns the number of posts updated.
+    """
+    Post = posts.model
+    Comment = Post._meta.get_field('comments').related_model
+    Like = Post._meta.get_field('likes').remote_field.through
+    return posts.update(
+        like_count=_count_per_post(Like.objects.all()),
+        comment_count=_count_per_post(Comment.objects.all()),
+    )
+
+
+def recount_post_likes(posts):
+    """Recomputes like_count alone, for changes that don't name their rows (a clear)."""
+    Like = posts.model._meta.get_field('likes').remote_field.through
+    return posts.update(like_count=_count_per_post(Like.objects.all()))
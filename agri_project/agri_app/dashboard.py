@@ -0,0 +1,80 @@
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .cache import cached_for_farmer
+from .models import Field, Crop, Activity, WeatherRecord, SecureRoute, ACTIVE_ACTIVITY_STATUSES
+
+# Everything the dashboard is built from; a change to any of these rebuilds it
+DASHBOARD_MODELS = ('field', 'crop', 'activity', 'weatherrecord', 'secureroute')
+UPCOMING_ACTIVITIES = 10
+
+
+def _fields(farmer):
+    latest_reading = WeatherRecord.objects.filter(field=OuterRef('pk')).order_by('-recorded_at', '-id')
+    current_crop = Crop.objects.filter(fields=OuterRef('pk')).exclude(status='harvested').order_by('-planted_on', '-id')
+    fields = list(
+        Field.objects.filter(farmer=farmer)
+        .annotate(
+            crop_count=Count('crops'),
+            current_crop=Subquery(current_crop.values('name')[:1]),
+            latest_weather_id=Subquery(latest_reading.values('id')[:1]),
+        )
+        .order_by('id')
+        .values('id', 'name', 'location', 'size_in_hectares', 'soil_type', 'crop_count', 'current_crop',
+                'latest_weather_id')
+    )
+    # The latest reading of every field in one more query
+    readings = WeatherRecord.objects.in_bulk(
+        [field['latest_weather_id'] for field in fields if field['latest_weather_id']]
+    )
+    for field in fields:
+        reading = readings.get(field.pop('latest_weather_id'))
+        field['latest_weather'] = reading and {
+            'recorded_at': reading.recorded_at, 'temperature': reading.temperature,
+            'humidity': reading.humidity, 'rainfall': reading.rainfall,
+        }
+    return fields
+
+
+def build_dashboard(farmer):
+    """
+    The farmer's summary: fields with crop counts, current crop and latest
+    reading; upcoming activities; route counts by security status; crops by
+    status. Five queries whatever the farm's size.
+    """
+    today = timezone.localdate()
+    upcoming = (
+        Activity.objects.filter(farmer=farmer, status__in=ACTIVE_ACTIVITY_STATUSES, scheduled_date__gte=today)
+        .order_by('scheduled_date', 'id')
+        .values('id', 'title', 'status', 'scheduled_date', 'field_id', 'field__name', 'crop__name')
+        [:UPCOMING_ACTIVITIES]
+    )
+    routes = SecureRoute.objects.filter(farmer=farmer).aggregate(
+        total=Count('id'),
+        red=Count('id', filter=Q(security_status='red')),
+        yellow=Count('id', filter=Q(security_status='yellow')),
+    )
+    crop_statuses = (
+        Crop.objects.filter(fields__farmer=farmer).order_by()
+        .values_list('status').annotate(count=Count('id'))
+    )
+    return {
+        'fields': _fields(farmer),
+        'upcoming_activities': [
+            {
+                'id': activity['id'], 'title': activity['title'], 'status': activity['status'],
+                'scheduled_date': activity['scheduled_date'], 'field_id': activity['field_id'],
+                'field_name': activity['field__name'], 'crop_name': activity['crop__name'],
+            }
+            for activity in upcoming
+        ],
+        'routes': routes,
+        'crop_statuses': dict(crop_statuses),
+    }
+
+
+def get_dashboard(farmer):
+    """build_dashboard from the per-farmer cache; the day is part of the key, as "upcoming" depends on it."""
+    return cached_for_farmer(
+        farmer.pk, DASHBOARD_MODELS, ('dashboard', timezone.localdate()), lambda: build_dashboard(farmer)
+    )
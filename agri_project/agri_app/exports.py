@@ -0,0 +1,70 @@
+import csv
+import json
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+WEATHER_EXPORT_COLUMNS = [
+    'id',
+    'field_id',
+    'recorded_at',
+    'location',
+    'temperature',
+    'humidity',
+    'rainfall',
+    'wind_speed',
+    'source',
+]
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+# Rows joined into one chunk of the HTTP response
+EXPORT_LINES_PER_WRITE = 500
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, so csv.writer can feed a generator."""
+    def write(self, value):
+        return value
+
+
+def _weather_rows(queryset):
+    rows = queryset.order_by('recorded_at', 'id').values_list(*WEATHER_EXPORT_COLUMNS)
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = list(row)
+        row[2] = row[2].isoformat()
+        yield row
+
+
+def _buffered(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= EXPORT_LINES_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _csv_lines(queryset):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(WEATHER_EXPORT_COLUMNS)
+    for row in _weather_rows(queryset):
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(queryset):
+    for row in _weather_rows(queryset):
+        yield json.dumps(dict(zip(WEATHER_EXPORT_COLUMNS, row))) + '\n'
+
+
+def stream_weather_export(queryset, export_format):
+    """
+    Yields the export body chunk by chunk. Rows come from a server-side cursor
+    (.iterator), so memory stays flat whatever the size of the history.
+    """
+    lines = _csv_lines(queryset) if export_format == 'csv' else _ndjson_lines(queryset)
+    return _buffered(lines)
@@ -0,0 +1,76 @@
+import math
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .geo import bbox_around, distance_km, parse_geojson
+
+DEFAULT_NEAR_RADIUS_KM = 5.0
+MAX_NEAR_RADIUS_KM = 500.0
+
+
+def _floats(value, count, param, example):
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count or not all(math.isfinite(number) for number in numbers):
+        raise ValidationError({param: f"Expected {example}."})
+    return numbers
+
+
+def _overlapping(queryset, min_lon, min_lat, max_lon, max_lat):
+    return queryset.filter(
+        bbox_min_lon__lte=max_lon, bbox_max_lon__gte=min_lon,
+        bbox_min_lat__lte=max_lat, bbox_max_lat__gte=min_lat,
+    )
+
+
+class SecureRouteGeoFilter(BaseFilterBackend):
+    """
+    Spatial filters for routes:
+    ?bbox=min_lon,min_lat,max_lon,max_lat keeps routes whose bounding box overlaps it.
+    ?near=lat,lon&radius=<km> keeps routes passing within the radius (default 5 km).
+    Candidates are pruned with the stored, indexed bounding boxes in the
+    database; only those are parsed for the exact distance check.
+    """
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get('bbox'):
+            min_lon, min_lat, max_lon, max_lat = _floats(
+                params['bbox'], 4, 'bbox', "min_lon,min_lat,max_lon,max_lat"
+            )
+            queryset = _overlapping(queryset, min_lon, min_lat, max_lon, max_lat)
+
+        if params.get('near'):
+            lat, lon = _floats(params['near'], 2, 'near', "lat,lon")
+            radius = DEFAULT_NEAR_RADIUS_KM
+            if params.get('radius'):
+                radius = _floats(params['radius'], 1, 'radius', "a radius in km")[0]
+            if not 0 < radius <= MAX_NEAR_RADIUS_KM:
+                raise ValidationError({'radius': f"Radius must be between 0 and {MAX_NEAR_RADIUS_KM} km."})
+
+            candidates = _overlapping(queryset, *bbox_around(lat, lon, radius))
+            matching = [
+                route_id
+                for route_id, geojson in candidates.values_list('id', 'route_path_geojson')
+                if distance_km(lat, lon, parse_geojson(geojson)) <= radius
+            ]
+            queryset = queryset.filter(pk__in=matching)
+
+        return queryset
+
+
+class RankedSearchFilter(BaseFilterBackend):
+    """
+    ?search=<terms> handed to the view's search_function(queryset, terms),
+    which filters and orders by relevance instead of LIKE-scanning every column.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        return view.search_function(queryset, terms)
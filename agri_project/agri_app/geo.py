@@ -0,0 +1,197 @@
+import json
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def _positions(coordinates, depth):
+    """Flattens a GeoJSON coordinate array of the given nesting depth into parts."""
+    if depth == 0:
+        return [[_position(coordinates)]]
+    if depth == 1:
+        return [[_position(position) for position in coordinates]]
+    parts = []
+    for child in coordinates:
+        parts.extend(_positions(child, depth - 1))
+    return parts
+
+
+def _position(position):
+    lon, lat = float(position[0]), float(position[1])
+    if not (-180.0 <= lon <= 180.0 and -90.0 <= lat <= 90.0):
+        raise ValueError("Coordinate out of range")
+    return lon, lat
+
+
+# Nesting depth of 'coordinates' for each geometry type
+_DEPTHS = {
+    'Point': 0,
+    'MultiPoint': 1,
+    'LineString': 1,
+    'MultiLineString': 2,
+    'Polygon': 2,
+    'MultiPolygon': 3,
+}
+
+
+def _geometry_parts(geometry):
+    kind = geometry.get('type')
+    if kind == 'Feature':
+        return _geometry_parts(geometry.get('geometry') or {})
+    if kind == 'FeatureCollection':
+        return [part for feature in geometry.get('features', []) for part in _geometry_parts(feature)]
+    if kind == 'GeometryCollection':
+        return [part for child in geometry.get('geometries', []) for part in _geometry_parts(child)]
+    if kind in _DEPTHS:
+        return _positions(geometry['coordinates'], _DEPTHS[kind])
+    raise ValueError(f"Unsupported GeoJSON type: {kind}")
+
+
+def parse_geojson(text):
+    """
+    Returns the geometry as a list of parts, each a list of (lon, lat) tuples
+    (a single point is a one-vertex part). Invalid or empty GeoJSON gives [].
+    """
+    try:
+        parts = _geometry_parts(json.loads(text))
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        return []
+    return [part for part in parts if part]
+
+
+def bounding_box(parts):
+    """(min_lon, min_lat, max_lon, max_lat) of all vertices, or None for no geometry."""
+    lons = [lon for part in parts for lon, _ in part]
+    lats = [lat for part in parts for _, lat in part]
+    if not lons:
+        return None
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+def bbox_around(lat, lon, radius_km):
+    """Bounding box of a circle, used to prune candidates before exact distance checks."""
+    delta_lat = radius_km / KM_PER_DEGREE
+    delta_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    return lon - delta_lon, lat - delta_lat, lon + delta_lon, lat + delta_lat
+
+
+def _point_segment_distance(x, y, x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+def distance_km(lat, lon, parts):
+    """
+    Shortest distance from a point to the geometry, on a local equirectangular
+    projection centred on the point: accurate to well under 1% at route scale.
+    """
+    scale_x = KM_PER_DEGREE * math.cos(math.radians(lat))
+    best = math.inf
+    for part in parts:
+        projected = [((p_lon - lon) * scale_x, (p_lat - lat) * KM_PER_DEGREE) for p_lon, p_lat in part]
+        if len(projected) == 1:
+            best = min(best, math.hypot(*projected[0]))
+            continue
+        for (x1, y1), (x2, y2) in zip(projected, projected[1:]):
+            best = min(best, _point_segment_distance(0.0, 0.0, x1, y1, x2, y2))
+    return best
+
+
+def simplify(part, tolerance):
+    """
+    Douglas-Peucker simplification of one part (tolerance in degrees).
+    End points are always kept; parts of one or two vertices come back unchanged.
+    """
+    if len(part) < 3:
+        return list(part)
+
+    keep = [False] * len(part)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(part) - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = part[first]
+        x2, y2 = part[last]
+        farthest, index = 0.0, None
+        for i in range(first + 1, last):
+            x, y = part[i]
+            distance = _point_segment_distance(x, y, x1, y1, x2, y2)
+            if distance > farthest:
+                farthest, index = distance, i
+        if index is not None and farthest > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(part, keep) if kept]
+
+
+def _encode_value(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+
+def encode_polyline(part, precision=5):
+    """Encoded Polyline Algorithm Format (lat, lon order), as read by Leaflet and Google Maps."""
+    factor = 10 ** precision
+    encoded = []
+    previous_lat = previous_lon = 0
+    for lon, lat in part:
+        lat, lon = round(lat * factor), round(lon * factor)
+        encoded.append(_encode_value(lat - previous_lat))
+        encoded.append(_encode_value(lon - previous_lon))
+        previous_lat, previous_lon = lat, lon
+    return ''.join(encoded)
+
+
+def decode_polyline(encoded, precision=5):
+    """Inverse of encode_polyline; returns (lon, lat) tuples."""
+    factor = 10 ** precision
+    values, value, shift = [], 0, 0
+    for char in encoded:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1f) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+
+    part, lat, lon = [], 0, 0
+    for delta_lat, delta_lon in zip(values[::2], values[1::2]):
+        lat += delta_lat
+        lon += delta_lon
+        part.append((lon / factor, lat / factor))
+    return part
+
+
+# Map zoom levels with a precomputed geometry, coarse to fine
+ROUTE_ZOOM_LEVELS = (8, 12, 16)
+ROUTE_SIMPLIFY_PRESETS = {'coarse': 8, 'medium': 12, 'fine': 16}
+
+
+def zoom_tolerance(zoom):
+    """Degrees covered by one 256px-tile pixel at a zoom level: errors below it are invisible."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def simplified_levels(parts):
+    """{zoom: [encoded polyline per part]} for every precomputed zoom level."""
+    return {
+        str(zoom): [encode_polyline(simplify(part, zoom_tolerance(zoom))) for part in parts]
+        for zoom in ROUTE_ZOOM_LEVELS
+    }
+
+
+def level_for_zoom(zoom):
+    """The coarsest precomputed level that is still precise enough for the requested zoom."""
+    for level in ROUTE_ZOOM_LEVELS:
+        if level >= zoom:
+            return level
+    return ROUTE_ZOOM_LEVELS[-1]
@@ -0,0 +1,56 @@
+import json
+import re
+
+from django.utils import timezone
+
+from .dashboard import UPCOMING_ACTIVITIES
+from .models import Activity, Crop, WeatherRecord, SecureRoute, Review, ACTIVE_ACTIVITY_STATUSES
+
+# The queries behind the busiest pages and endpoints, as functions of a farmer id.
+# Each mirrors the filter and ordering of the view that runs it (keep them in
+# step); explain_hot_queries checks that each of them is served by an index.
+HOT_QUERIES = {
+    'weather_recent': lambda farmer_id: (
+        WeatherRecord.objects.filter(farmer_id=farmer_id).order_by('-recorded_at', '-id')[:50]
+    ),
+    'activity_calendar': lambda farmer_id: (
+        Activity.objects.filter(farmer_id=farmer_id).order_by('scheduled_date', 'id')[:50]
+    ),
+    # The dashboard's upcoming tasks
+    'activity_open': lambda farmer_id: (
+        Activity.objects.filter(
+            farmer_id=farmer_id, status__in=ACTIVE_ACTIVITY_STATUSES, scheduled_date__gte=timezone.localdate(),
+        ).order_by('scheduled_date', 'id')[:UPCOMING_ACTIVITIES]
+    ),
+    'crop_by_status': lambda farmer_id: (
+        Crop.objects.filter(fields__farmer_id=farmer_id).order_by('status', 'expected_harvest')
+    ),
+    'crop_recent': lambda farmer_id: (
+        Crop.objects.filter(fields__farmer_id=farmer_id).order_by('-planted_on', '-id')[:50]
+    ),
+    'route_recent': lambda farmer_id: (
+        SecureRoute.objects.filter(farmer_id=farmer_id).order_by('-last_updated', '-id')[:50]
+    ),
+    'review_latest': lambda farmer_id: Review.objects.order_by('-created_at', '-id')[:5],
+}
+
+# SQLite reports a full table scan as "SCAN <table>" with no "USING ... INDEX"
+_SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)')
+
+
+def _postgres_seq_scans(node):
+    tables = []
+    if node.get('Node Type') == 'Seq Scan':
+        tables.append(node.get('Relation Name'))
+    for child in node.get('Plans', []):
+        tables.extend(_postgres_seq_scans(child))
+    return tables
+
+
+def explain(queryset, vendor):
+    """Returns (plan text, tables read with a sequential scan)."""
+    if vendor == 'postgresql':
+        plan = json.loads(queryset.explain(format='json'))
+        return json.dumps(plan, indent=2), _postgres_seq_scans(plan[0]['Plan'])
+    plan = queryset.explain()
+    return plan, _SQLITE_SCAN.findall(plan)
@@ -0,0 +1,115 @@
+from datetime import date, datetime, time, timezone as dt_timezone
+
+import numpy as np
+from django.utils import timezone
+
+from .models import WeatherRollup
+
+# Base temperature for growing degree days (°C); 10 °C suits maize, beans and most cereals
+GDD_BASE_TEMPERATURE = 10.0
+# A day whose maximum reaches this temperature (°C) counts as a heat-stress day
+HEAT_STRESS_THRESHOLD = 35.0
+
+# Spacing between fields in the combined (field, day) sort key; larger than any date ordinal
+_FIELD_STRIDE = 10 ** 7
+
+
+def _empty_indicators():
+    return {
+        'growing_degree_days': 0.0,
+        'rainfall_since_planting': 0.0,
+        'heat_stress_days': 0,
+        'days_with_readings': 0,
+    }
+
+
+def _crop_window(crop, today):
+    """First and last day (as ordinals) the indicators cover for a crop."""
+    end = today
+    if crop.status == 'harvested' and crop.expected_harvest:
+        end = min(crop.expected_harvest, today)
+    return crop.planted_on.toordinal(), end.toordinal()
+
+
+def load_daily_series(field_ids, since):
+    """
+    Loads the daily weather rollups of the given fields since a date in one
+    query, as per-field daily arrays.
+
+    Returns (keys, tmin, tmax, rainfall), where keys encode (field id, day ordinal)
+    and are sorted ascending.
+    """
+    rows = WeatherRollup.objects.filter(
+        field_id__in=field_ids, bucket='day',
+        bucket_start__gte=datetime.combine(since, time.min, tzinfo=dt_timezone.utc),
+    ).order_by('field_id', 'bucket_start').values_list(
+        'field_id', 'bucket_start', 'temperature_min', 'temperature_max', 'rainfall_total'
+    )
+    rows = list(rows)
+    if not rows:
+        empty = np.empty(0)
+        return np.empty(0, dtype=np.int64), empty, empty, empty
+
+    field_ids, starts, tmin, tmax, rainfall = zip(*rows)
+    # Day buckets start at UTC midnight
+    days = np.fromiter(
+        (start.astimezone(dt_timezone.utc).toordinal() for start in starts), dtype=np.int64, count=len(rows),
+    )
+    return (
+        np.asarray(field_ids, dtype=np.int64) * _FIELD_STRIDE + days,
+        np.asarray(tmin, dtype=np.float64),
+        np.asarray(tmax, dtype=np.float64),
+        np.asarray(rainfall, dtype=np.float64),
+    )
+
+
+def compute_crop_indicators(crops, today=None):
+    """
+    Growing degree days, rainfall since planting and heat-stress days for many crops.
+
+    The daily rollups of the crops' fields are loaded once; every crop's window
+    is then a slice of per-field cumulative sums found with searchsorted, so
+    the cost does not grow with a Python loop over days.
+    Returns {crop id: indicators}.
+    """
+    crops = list(crops)
+    if not crops:
+        return {}
+    today = today or timezone.localdate()
+
+    windows = np.array([_crop_window(crop, today) for crop in crops], dtype=np.int64)
+    crop_fields = np.array([crop.fields_id for crop in crops], dtype=np.int64)
+
+    keys, tmin, tmax, rainfall = load_daily_series(
+        set(crop_fields.tolist()), date.fromordinal(int(windows[:, 0].min()))
+    )
+
+    daily_gdd = np.clip((tmin + tmax) / 2.0 - GDD_BASE_TEMPERATURE, 0.0, None)
+    heat_days = (tmax >= HEAT_STRESS_THRESHOLD).astype(np.int64)
+
+    # Leading zero so a window [lo, hi) sums to cumulative[hi] - cumulative[lo]
+    cumulative_gdd = np.r_[0.0, np.cumsum(daily_gdd)]
+    cumulative_rain = np.r_[0.0, np.cumsum(rainfall)]
+    cumulative_heat = np.r_[0, np.cumsum(heat_days)]
+
+    lo = np.searchsorted(keys, crop_fields * _FIELD_STRIDE + windows[:, 0], side='left')
+    hi = np.searchsorted(keys, crop_fields * _FIELD_STRIDE + windows[:, 1], side='right')
+    hi = np.maximum(hi, lo)
+
+    gdd = cumulative_gdd[hi] - cumulative_gdd[lo]
+    rain = cumulative_rain[hi] - cumulative_rain[lo]
+    heat = cumulative_heat[hi] - cumulative_heat[lo]
+    covered = hi - lo
+
+    results = {}
+    for index, crop in enumerate(crops):
+        if not covered[index]:
+            results[crop.id] = _empty_indicators()
+            continue
+        results[crop.id] = {
+            'growing_degree_days': round(float(gdd[index]), 1),
+            'rainfall_since_planting': round(float(rain[index]), 1),
+            'heat_stress_days': int(heat[index]),
+            'days_with_readings': int(covered[index]),
+        }
+    return results
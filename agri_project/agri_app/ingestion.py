@@ -0,0 +1,96 @@
+from django.db import transaction
+
+from .models import Field, WeatherRecord
+from .cache import bump_versions
+from .rollups import refresh_rollups_for_records
+from .serializers import WeatherRecordBulkItemSerializer
+
+# Upper bound for one upload; gateways should split bigger backlogs.
+WEATHER_BULK_MAX_ROWS = 5000
+WEATHER_BULK_BATCH_SIZE = 500
+
+# Columns overwritten when a reading for the same (field, recorded_at) is re-sent
+WEATHER_UPSERT_FIELDS = ['location', 'temperature', 'humidity', 'rainfall', 'wind_speed', 'source', 'updated_at']
+
+
+def ingest_weather_rows(farmer, rows):
+    """
+    Validates and upserts a batch of weather readings for one farmer.
+
+    Field ownership is checked with a single query for the whole batch and the
+    rows are written with bulk_create upserts keyed on (field, recorded_at), so a
+    reading sent twice updates the stored row instead of failing.
+    Returns one result dict per input row, in input order.
+    """
+    results = [None] * len(rows)
+    valid = []
+
+    for index, row in enumerate(rows):
+        serializer = WeatherRecordBulkItemSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((index, dict(serializer.validated_data)))
+        else:
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+    # Ownership check for every referenced field in one query
+    field_ids = {data['field'] for _, data in valid if data.get('field') is not None}
+    owned_field_ids = set()
+    if field_ids:
+        owned_field_ids = set(
+            Field.objects.filter(farmer=farmer, id__in=field_ids).values_list('id', flat=True)
+        )
+
+    # Keep the last reading for each (field, recorded_at) key; Postgres refuses to
+    # upsert the same row twice in one statement.
+    pending = {}
+    for index, data in valid:
+        field_id = data.pop('field', None)
+        if field_id is not None and field_id not in owned_field_ids:
+            results[index] = {
+                'index': index,
+                'status': 'error',
+                'errors': {'field': ["You cannot record weather for a field you do not own."]},
+            }
+            continue
+
+        # Readings without a field are never de-duplicated (NULLs are distinct in the unique index)
+        key = (field_id, data['recorded_at']) if field_id is not None else ('row', index)
+        if key in pending:
+            earlier_index = pending[key][0]
+            results[earlier_index] = {'index': earlier_index, 'status': 'duplicate'}
+        pending[key] = (index, WeatherRecord(farmer=farmer, field_id=field_id, **data))
+
+    if not pending:
+        return results
+
+    records = [record for _, record in pending.values()]
+    keyed = [record for record in records if record.field_id is not None]
+    existing_keys = set()
+    if keyed:
+        existing_keys = set(
+            WeatherRecord.objects.filter(
+                field_id__in={record.field_id for record in keyed},
+                recorded_at__in={record.recorded_at for record in keyed},
+            ).values_list('field_id', 'recorded_at')
+        )
+
+    with transaction.atomic():
+        WeatherRecord.objects.bulk_create(
+            records,
+            batch_size=WEATHER_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['field', 'recorded_at'],
+            update_fields=WEATHER_UPSERT_FIELDS,
+        )
+        # bulk_create skips post_save, so rollups are refreshed once per touched bucket here
+        refresh_rollups_for_records(records)
+        bump_versions(farmer.pk, 'weatherrecord')
+
+    for index, record in pending.values():
+        updated = (record.field_id, record.recorded_at) in existing_keys
+        results[index] = {
+            'index': index,
+            'status': 'updated' if updated else 'created',
+            'id': record.pk,
+        }
+    return results
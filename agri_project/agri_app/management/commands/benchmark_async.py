@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from agri_app.benchmarks import STACK_PAIRS, BenchmarkError, run_stack_comparison
+from agri_app.models import Farmer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the sync API views (thread pool, as under WSGI) with their async variants "
+        "(one event loop, as under ASGI) at the same concurrency, against generated data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', help="Username to benchmark as (default: the first generated farmer).")
+        parser.add_argument('--prefix', default='bench_', help="Username prefix of generated farmers.")
+        parser.add_argument('--only', action='append', metavar='NAME',
+                            help="Only compare endpoints whose name starts with this (can be repeated).")
+        parser.add_argument('--requests', type=int, default=100, help="Requests per endpoint and stack.")
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        if options['farmer']:
+            farmer = Farmer.objects.filter(username=options['farmer']).first()
+        else:
+            farmer = Farmer.objects.filter(username__startswith=options['prefix']).order_by('id').first()
+        if farmer is None:
+            raise CommandError("No farmer to benchmark; run generate_farm_data first.")
+
+        pairs = STACK_PAIRS
+        if options['only']:
+            pairs = [pair for pair in STACK_PAIRS if any(pair[0].startswith(name) for name in options['only'])]
+
+        try:
+            results = run_stack_comparison(
+                farmer, pairs, requests=options['requests'], concurrency=options['concurrency'],
+            )
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{options['concurrency']} requests in flight, {options['requests']} per endpoint")
+        self.stdout.write(f"{'endpoint':<18} {'stack':<6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, stacks in results.items():
+            for stack, stats in stacks.items():
+                self.stdout.write(
+                    f"{name:<18} {stack:<6} {stats['requests_per_s']:>8.1f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f}"
+                )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from agri_app.benchmarks import run_login_benchmark
+from agri_app.models import Farmer
+from agri_app.management.commands.generate_farm_data import GENERATED_PASSWORD
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures sign-in throughput under concurrent logins (a harvest-season peak) against "
+        "generated farmers (see generate_farm_data), and the latency of successful, "
+        "wrong-password and unknown-user attempts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench_', help="Username prefix of generated farmers.")
+        parser.add_argument('--password', default=GENERATED_PASSWORD)
+        parser.add_argument('--attempts', type=int, default=300)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--by', choices=['username', 'email'], default='email',
+                            help="Identifier farmers sign in with.")
+        parser.add_argument('--farmers', type=int, default=100, help="How many farmers to sign in as.")
+
+    def handle(self, *args, **options):
+        identifiers = list(
+            Farmer.objects.filter(username__startswith=options['prefix'])
+            .order_by('id').values_list(options['by'], flat=True)[:options['farmers']]
+        )
+        if not identifiers:
+            raise CommandError("No farmers to sign in as; run generate_farm_data first.")
+        # Mixed case, as typed on phones
+        identifiers = [identifier.capitalize() for identifier in identifiers]
+
+        result = run_login_benchmark(
+            identifiers, options['password'], attempts=options['attempts'], concurrency=options['concurrency'],
+        )
+        self.stdout.write(
+            f"{result['logins_per_s']} logins/s with {options['concurrency']} threads, "
+            f"{result['queries_per_login']} queries per login"
+        )
+        self.stdout.write(f"{'outcome':<16} {'count':>6} {'expected':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for outcome, stats in result['outcomes'].items():
+            self.stdout.write(
+                f"{outcome:<16} {stats['count']:>6} {stats['expected']:>9} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f}"
+            )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from agri_app.hot_queries import HOT_QUERIES, explain
+from agri_app.models import Farmer
+
+
+class Command(BaseCommand):
+    help = "Runs EXPLAIN on every registered hot query and reports sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', type=int, help="Farmer id to plan the queries for (default: the first one).")
+        parser.add_argument('--allow-seqscan', action='store_true',
+                            help="Keep the planner's natural choice. By default PostgreSQL is told to avoid "
+                                 "sequential scans, so one only shows up when no index can serve the query "
+                                 "(small tables are otherwise always scanned).")
+        parser.add_argument('--plans', action='store_true', help="Print the full plan of every query.")
+        parser.add_argument('--strict', action='store_true', help="Exit with an error if any query scans a table.")
+
+    def handle(self, *args, **options):
+        farmer_id = options['farmer'] or Farmer.objects.order_by('id').values_list('id', flat=True).first() or 0
+        vendor = connection.vendor
+
+        flagged = []
+        with transaction.atomic():
+            if vendor == 'postgresql' and not options['allow_seqscan']:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, build in HOT_QUERIES.items():
+                plan, scans = explain(build(farmer_id), vendor)
+                if scans:
+                    flagged.append(name)
+                    self.stdout.write(self.style.WARNING(f"{name}: sequential scan on {', '.join(scans)}"))
+                else:
+                    self.stdout.write(f"{name}: ok")
+                if options['plans']:
+                    self.stdout.write(plan)
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS(f"All {len(HOT_QUERIES)} hot queries use indexes."))
+        elif options['strict']:
+            raise CommandError(f"Sequential scans in: {', '.join(flagged)}")
@@ -0,0 +1,195 @@
+import json
+import math
+import random
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from agri_app.models import Farmer, Field, Crop, Activity, WeatherRecord, SecureRoute
+from agri_app.rollups import rebuild_rollups
+from agri_app.search import update_route_search_vector
+
+CROPS = [
+    ('Maize', 'Cereal'), ('Beans', 'Legume'), ('Cassava', 'Root'), ('Sorghum', 'Cereal'),
+    ('Groundnut', 'Legume'), ('Sweet potato', 'Root'), ('Banana', 'Fruit'), ('Tomato', 'Vegetable'),
+]
+SOILS = ['Clay', 'Loam', 'Sandy', 'Silt', 'Volcanic']
+# (name, lat, lon, mean temperature in °C)
+REGIONS = [
+    ('Goma', -1.68, 29.23, 21.0), ('Bukavu', -2.51, 28.86, 20.0), ('Butembo', 0.14, 29.29, 18.5),
+    ('Beni', 0.49, 29.47, 24.0), ('Uvira', -3.40, 29.14, 25.5),
+]
+TASKS = ['Planting', 'Weeding', 'Fertilizing', 'Scouting', 'Spraying', 'Harvesting']
+RISK_NOTES = [
+    '', 'Checkpoint after the market', 'Road washed out after heavy rain',
+    'Armed group reported near the bridge', 'Slow traffic on market days',
+]
+# Password of every generated farmer, so benchmarks and manual checks can log in
+GENERATED_PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a synthetic, reproducible farm dataset with bulk_create. "
+        "Production scale is e.g. --farmers 10000 --fields-per-farmer 10 --crops-per-field 10 "
+        "--readings-per-field 500 (100k fields, 1M crops, 50M weather readings)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmers', type=int, default=50)
+        parser.add_argument('--fields-per-farmer', type=int, default=10)
+        parser.add_argument('--crops-per-field', type=int, default=10)
+        parser.add_argument('--activities-per-field', type=int, default=5)
+        parser.add_argument('--readings-per-field', type=int, default=500)
+        parser.add_argument('--reading-interval-hours', type=int, default=3)
+        parser.add_argument('--routes-per-farmer', type=int, default=2)
+        parser.add_argument('--end', type=date.fromisoformat, default=None,
+                            help="Day the weather history ends (YYYY-MM-DD, default today).")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='bench_', help="Username prefix of the generated farmers.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--farmers-per-chunk', type=int, default=200,
+                            help="Farmers generated (and committed) per transaction.")
+        parser.add_argument('--skip-rollups', action='store_true')
+        parser.add_argument('--clear', action='store_true', help="Delete farmers with the prefix first.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.password = make_password(GENERATED_PASSWORD)
+        self.end = datetime.combine(options['end'] or date.today(), time.min, tzinfo=dt_timezone.utc)
+        prefix = options['prefix']
+
+        if options['clear']:
+            deleted, _ = Farmer.objects.filter(username__startswith=prefix).delete()
+            self.stdout.write(f"Deleted {deleted} existing rows.")
+
+        start = Farmer.objects.filter(username__startswith=prefix).count()
+        totals = dict.fromkeys(['farmers', 'fields', 'crops', 'activities', 'weather', 'routes'], 0)
+        chunk_size = options['farmers_per_chunk']
+        for offset in range(0, options['farmers'], chunk_size):
+            numbers = range(start + offset, start + min(offset + chunk_size, options['farmers']))
+            with transaction.atomic():
+                counts = self.generate_chunk(prefix, numbers)
+            for key, value in counts.items():
+                totals[key] += value
+            self.stdout.write(f"  {totals['farmers']} farmers, {totals['weather']} readings...")
+
+        self.stdout.write(self.style.SUCCESS(
+            "Generated " + ", ".join(f"{value} {key}" for key, value in totals.items()) + "."
+        ))
+
+    def generate_chunk(self, prefix, numbers):
+        options = self.options
+        batch_size = options['batch_size']
+        farmers = Farmer.objects.bulk_create([
+            Farmer(
+                username=f'{prefix}{number:06d}', email=f'{prefix}{number:06d}@example.com',
+                password=self.password, farm_name=f'Farm {number}',
+                city_or_region=self.random.choice(REGIONS)[0],
+            )
+            for number in numbers
+        ], batch_size=batch_size)
+        regions = {region[0]: region for region in REGIONS}
+
+        fields = Field.objects.bulk_create([
+            Field(
+                farmer=farmer, name=f'Plot {index + 1}', location=farmer.city_or_region,
+                size_in_hectares=round(self.random.uniform(0.2, 12.0), 2), soil_type=self.random.choice(SOILS),
+            )
+            for farmer in farmers for index in range(options['fields_per_farmer'])
+        ], batch_size=batch_size)
+
+        today = self.end.date()
+        crops = []
+        for field in fields:
+            for _ in range(options['crops_per_field']):
+                name, category = self.random.choice(CROPS)
+                planted_on = today - timedelta(days=self.random.randint(0, 240))
+                expected_harvest = planted_on + timedelta(days=self.random.randint(60, 180))
+                status = 'harvested' if expected_harvest < today else self.random.choice(['planted', 'growing'])
+                crops.append(Crop(
+                    fields=field, name=name, category=category, status=status,
+                    planted_on=planted_on, expected_harvest=expected_harvest,
+                ))
+        crops = Crop.objects.bulk_create(crops, batch_size=batch_size)
+        crops_by_field = {}
+        for crop in crops:
+            crops_by_field.setdefault(crop.fields_id, []).append(crop)
+
+        activities = [
+            Activity(
+                farmer_id=field.farmer_id, field=field, title=self.random.choice(TASKS),
+                crop=self.random.choice(crops_by_field[field.id]) if field.id in crops_by_field else None,
+                scheduled_date=today + timedelta(days=self.random.randint(-60, 60)),
+                status=self.random.choice(['scheduled', 'in_progress', 'completed', 'canceled']),
+            )
+            for field in fields for _ in range(options['activities_per_field'])
+        ]
+        Activity.objects.bulk_create(activities, batch_size=batch_size)
+
+        routes = []
+        for farmer in farmers:
+            _, lat, lon, _ = regions[farmer.city_or_region]
+            for index in range(options['routes_per_farmer']):
+                route = SecureRoute(
+                    farmer=farmer, route_name=f'{farmer.city_or_region} road {index + 1}',
+                    route_path_geojson=json.dumps(self.route_geometry(lat, lon)),
+                    security_status=self.random.choice(['green', 'yellow', 'red']),
+                    risk_notes=self.random.choice(RISK_NOTES),
+                )
+                route.update_geometry()
+                routes.append(route)
+        routes = SecureRoute.objects.bulk_create(routes, batch_size=batch_size)
+        update_route_search_vector([route.pk for route in routes])
+
+        readings = self.create_weather(fields, {farmer.id: regions[farmer.city_or_region] for farmer in farmers})
+        if not options['skip_rollups'] and readings:
+            rebuild_rollups(farmers)
+
+        return {
+            'farmers': len(farmers), 'fields': len(fields), 'crops': len(crops),
+            'activities': len(activities), 'weather': readings, 'routes': len(routes),
+        }
+
+    def route_geometry(self, lat, lon, vertices=20):
+        """A wandering road of a few kilometres starting near the region's town."""
+        lat += self.random.uniform(-0.2, 0.2)
+        lon += self.random.uniform(-0.2, 0.2)
+        coordinates = []
+        for _ in range(vertices):
+            coordinates.append([round(lon, 5), round(lat, 5)])
+            lat += self.random.uniform(-0.004, 0.004)
+            lon += self.random.uniform(0.001, 0.006)
+        return {'type': 'LineString', 'coordinates': coordinates}
+
+    def create_weather(self, fields, region_of_farmer):
+        """Readings on a regular grid ending at --end, written in batches without holding them all."""
+        count = self.options['readings_per_field']
+        interval = timedelta(hours=self.options['reading_interval_hours'])
+        first = self.end - interval * count
+        batch, written = [], 0
+        for field in fields:
+            mean = region_of_farmer[field.farmer_id][3]
+            for index in range(count):
+                recorded_at = first + interval * index
+                hour = recorded_at.hour + recorded_at.minute / 60
+                # Daily cycle peaking mid-afternoon, plus noise
+                temperature = mean + 6 * math.sin((hour - 9) / 24 * 2 * math.pi) + self.random.gauss(0, 1.5)
+                batch.append(WeatherRecord(
+                    farmer_id=field.farmer_id, field=field, recorded_at=recorded_at,
+                    location=field.location, temperature=round(temperature, 1),
+                    humidity=round(min(100.0, max(20.0, self.random.gauss(70, 12))), 1),
+                    rainfall=round(self.random.expovariate(1.5), 1) if self.random.random() < 0.2 else 0.0,
+                    wind_speed=round(abs(self.random.gauss(8, 4)), 1), source='sensor',
+                ))
+                if len(batch) >= self.options['batch_size']:
+                    WeatherRecord.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+        if batch:
+            WeatherRecord.objects.bulk_create(batch)
+            written += len(batch)
+        return written
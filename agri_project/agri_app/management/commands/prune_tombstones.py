@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from agri_app.models import Tombstone
+from agri_app.sync import TOMBSTONE_RETENTION
+
+
+class Command(BaseCommand):
+    help = "Deletes sync tombstones older than the retention window (clients with older cursors resync)."
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - TOMBSTONE_RETENTION
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from agri_app.models import Farmer, WeatherRollup
+from agri_app.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the hourly, daily and monthly weather rollups from the raw readings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--farmer', action='append', dest='farmers', metavar='USERNAME',
+            help="Only rebuild rollups for this farmer (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        farmers = None
+        if options['farmers']:
+            farmers = Farmer.objects.filter(username__in=options['farmers'])
+
+        rebuild_rollups(farmers)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt weather rollups ({WeatherRollup.objects.count()} rows)."
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from agri_app.counters import recount_post_counters
+from agri_app.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recomputes the stored like and comment counts of every post (or --post ids) in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', action='append', type=int, dest='posts', metavar='ID',
+                            help="Only repair this post (can be repeated).")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options['posts']:
+            posts = posts.filter(pk__in=options['posts'])
+        updated = recount_post_counters(posts)
+        self.stdout.write(self.style.SUCCESS(f"Recounted likes and comments of {updated} posts."))
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from agri_app.benchmarks import (
+    BENCHMARKS, BenchmarkError, compare_to_baseline, dataset_size, load_baseline, run_benchmarks,
+    save_baseline,
+)
+from agri_app.models import Farmer
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the main web and API endpoints against generated data (see generate_farm_data), "
+        "reports p50/p95 latency and query counts, and compares them with a saved baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', help="Username to benchmark as (default: the first generated farmer).")
+        parser.add_argument('--prefix', default='bench_', help="Username prefix of generated farmers.")
+        parser.add_argument('--only', action='append', metavar='NAME',
+                            help="Only run benchmarks whose name starts with this (can be repeated).")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--warm-cache', action='store_true',
+                            help="Leave the per-farmer response cache in place between runs.")
+        parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline.")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed p95 slowdown against the baseline (0.25 = 25%%).")
+
+    def handle(self, *args, **options):
+        if options['farmer']:
+            farmer = Farmer.objects.filter(username=options['farmer']).first()
+        else:
+            farmer = Farmer.objects.filter(username__startswith=options['prefix']).order_by('id').first()
+        if farmer is None:
+            raise CommandError("No farmer to benchmark; run generate_farm_data first.")
+
+        benchmarks = BENCHMARKS
+        if options['only']:
+            benchmarks = [b for b in BENCHMARKS if any(b.name.startswith(name) for name in options['only'])]
+
+        dataset = dataset_size(farmer)
+        self.stdout.write(f"Benchmarking as {farmer.username}: " + ", ".join(f"{v} {k}" for k, v in dataset.items()))
+        try:
+            results = run_benchmarks(
+                farmer, benchmarks, repeat=options['repeat'], warmup=options['warmup'],
+                warm_cache=options['warm_cache'],
+            )
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'benchmark':<24} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}")
+        for name, result in results.items():
+            self.stdout.write(f"{name:<24} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['queries']:>8}")
+
+        if options['save_baseline']:
+            save_baseline(options['baseline'], results, dataset)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}."))
+            return
+
+        if not options['baseline'].exists():
+            self.stdout.write("No baseline to compare with; use --save-baseline to record one.")
+            return
+
+        baseline = load_baseline(options['baseline'])
+        if baseline.get('dataset') != dataset:
+            self.stdout.write(self.style.WARNING(
+                "The baseline was recorded on a different dataset size; latency comparisons are approximate."
+            ))
+        regressions = compare_to_baseline(results, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
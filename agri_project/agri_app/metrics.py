@@ -0,0 +1,103 @@
+import threading
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets (Prometheus "le" labels)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# name: (help text, buckets); every histogram is labelled by route and method
+HISTOGRAMS = {
+    'agri_request_duration_seconds': ("Request latency.", SECONDS_BUCKETS),
+    'agri_request_queries': ("SQL queries run per request.", QUERY_COUNT_BUCKETS),
+    'agri_request_query_seconds': ("Total SQL time per request.", SECONDS_BUCKETS),
+    'agri_response_size_bytes': ("Response body size (streamed responses are not counted).", BYTES_BUCKETS),
+}
+REQUESTS_TOTAL = 'agri_requests_total'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    In-process request metrics. Each worker process keeps its own numbers,
+    so Prometheus should scrape every worker (or sum them) rather than one.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._requests = {}
+
+    def observe_request(self, route, method, status_code, duration, queries, query_seconds, size=None):
+        values = {
+            'agri_request_duration_seconds': duration,
+            'agri_request_queries': queries,
+            'agri_request_query_seconds': query_seconds,
+            'agri_response_size_bytes': size,
+        }
+        with self._lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                key = (name, route, method)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+            key = (route, method, str(status_code))
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            requests = sorted(self._requests.items())
+            snapshots = [(key, list(h.counts), h.total, h.count, h.buckets) for key, h in histograms]
+
+        lines = [
+            f"# HELP {REQUESTS_TOTAL} Requests handled, by route, method and status.",
+            f"# TYPE {REQUESTS_TOTAL} counter",
+        ]
+        for (route, method, status_code), count in requests:
+            lines.append(f'{REQUESTS_TOTAL}{{{_labels(route=route, method=method, status=status_code)}}} {count}')
+
+        for name, (help_text, _) in HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, route, method), counts, total, count, buckets in snapshots:
+                if metric != name:
+                    continue
+                labels = _labels(route=route, method=method)
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {total}')
+                lines.append(f'{name}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,96 @@
+import heapq
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+from .metrics import registry
+
+slow_logger = logging.getLogger('agri_app.slow_requests')
+
+# Slowest queries kept per request for the slow-request log
+SLOW_LOG_TOP_QUERIES = 5
+
+
+class QueryRecorder:
+    """connection.execute_wrapper hook that counts and times every SQL statement."""
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = []  # min-heap of (duration, sequence, sql)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.seconds += duration
+            entry = (duration, self.count, sql)
+            if len(self.slowest) < SLOW_LOG_TOP_QUERIES:
+                heapq.heappush(self.slowest, entry)
+            elif duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, SQL query count and time, and response size per resolved
+    URL name into agri_app.metrics. Requests slower than SLOW_REQUEST_MS are
+    logged with their slowest queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', None)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        # Async views run their queries on Django's database thread, out of
+        # reach of an execute_wrapper here, so only latency and size are kept
+        self.record(request, response, time.perf_counter() - started, None)
+        return response
+
+    def record(self, request, response, duration, recorder):
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name if match else None) or '<unmatched>'
+        size = None if response.streaming else len(response.content)
+        registry.observe_request(
+            route, request.method, response.status_code, duration,
+            recorder and recorder.count, recorder and recorder.seconds, size,
+        )
+
+        if self.slow_ms is not None and duration * 1000 >= self.slow_ms:
+            if recorder is None:
+                slow_logger.warning(
+                    "Slow request %s %s (%s): %.0f ms", request.method, request.path, route, duration * 1000,
+                )
+                return
+            queries = '\n'.join(
+                f"  {query_duration * 1000:.1f} ms: {sql[:500]}"
+                for query_duration, _, sql in sorted(recorder.slowest, reverse=True)
+            )
+            slow_logger.warning(
+                "Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms\n%s",
+                request.method, request.path, route, duration * 1000,
+                recorder.count, recorder.seconds * 1000, queries,
+            )
@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-18 15:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0006_alter_weatherrecord_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily'), ('month', 'Monthly')], max_length=10)),
+                ('bucket_start', models.DateTimeField(help_text='Start of the bucket (UTC).')),
+                ('reading_count', models.PositiveIntegerField(default=0)),
+                ('temperature_min', models.FloatField()),
+                ('temperature_max', models.FloatField()),
+                ('temperature_sum', models.FloatField()),
+                ('humidity_sum', models.FloatField()),
+                ('rainfall_total', models.FloatField()),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weather_rollups', to=settings.AUTH_USER_MODEL)),
+                ('field', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='weather_rollups', to='agri_app.field')),
+            ],
+            options={
+                'verbose_name': 'Weather Rollup',
+                'verbose_name_plural': 'Weather Rollups',
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['farmer', 'bucket', 'bucket_start'], name='agri_app_we_farmer__43e467_idx')],
+                'unique_together': {('farmer', 'field', 'bucket', 'bucket_start')},
+            },
+        ),
+    ]
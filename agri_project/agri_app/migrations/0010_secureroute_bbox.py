@@ -0,0 +1,54 @@
+# Generated by Django 6.0 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+from agri_app.geo import bounding_box, parse_geojson
+
+
+def fill_bounding_boxes(apps, schema_editor):
+    SecureRoute = apps.get_model('agri_app', 'SecureRoute')
+    for route in SecureRoute.objects.only('id', 'route_path_geojson').iterator():
+        bbox = bounding_box(parse_geojson(route.route_path_geojson))
+        if bbox:
+            SecureRoute.objects.filter(pk=route.pk).update(
+                bbox_min_lon=bbox[0], bbox_min_lat=bbox[1], bbox_max_lon=bbox[2], bbox_max_lat=bbox[3],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0009_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='secureroute',
+            name='bbox_max_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='secureroute',
+            name='bbox_max_lon',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='secureroute',
+            name='bbox_min_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='secureroute',
+            name='bbox_min_lon',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='secureroute',
+            index=models.Index(fields=['farmer', 'bbox_min_lon', 'bbox_max_lon'], name='agri_app_se_farmer__7df8f2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='secureroute',
+            index=models.Index(fields=['farmer', 'bbox_min_lat', 'bbox_max_lat'], name='agri_app_se_farmer__2d790c_idx'),
+        ),
+        migrations.RunPython(fill_bounding_boxes, migrations.RunPython.noop),
+    ]
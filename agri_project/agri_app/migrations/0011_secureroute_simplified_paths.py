@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+from agri_app.geo import parse_geojson, simplified_levels
+
+
+def fill_simplified_paths(apps, schema_editor):
+    SecureRoute = apps.get_model('agri_app', 'SecureRoute')
+    for route in SecureRoute.objects.only('id', 'route_path_geojson').iterator():
+        parts = parse_geojson(route.route_path_geojson)
+        if parts:
+            SecureRoute.objects.filter(pk=route.pk).update(simplified_paths=simplified_levels(parts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0010_secureroute_bbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='secureroute',
+            name='simplified_paths',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(fill_simplified_paths, migrations.RunPython.noop),
+    ]
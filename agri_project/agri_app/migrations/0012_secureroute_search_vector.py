@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-18 15:25
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN indexes and tsvector values only exist on PostgreSQL; other databases use icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX agri_app_secureroute_search_gin ON agri_app_secureroute USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX agri_app_secureroute_name_trgm ON agri_app_secureroute USING gin (route_name gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX agri_app_secureroute_notes_trgm ON agri_app_secureroute USING gin (risk_notes gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        "UPDATE agri_app_secureroute SET search_vector = "
+        "setweight(to_tsvector('simple', coalesce(route_name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(risk_notes, '')), 'B')"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in ('agri_app_secureroute_search_gin', 'agri_app_secureroute_name_trgm',
+                 'agri_app_secureroute_notes_trgm'):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0011_secureroute_simplified_paths'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='secureroute',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0012_secureroute_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['farmer', 'scheduled_date', 'id'], name='activity_farmer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(condition=models.Q(('status__in', ['scheduled', 'in_progress'])), fields=['farmer', 'scheduled_date'], name='activity_farmer_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['fields', 'status', 'expected_harvest'], name='crop_field_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['fields', '-planted_on', '-id'], name='crop_field_planted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-created_at', '-id'], name='review_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherrecord',
+            index=models.Index(fields=['farmer', '-recorded_at', '-id'], name='weather_farmer_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 15:44
+
+from django.db import migrations, models
+
+from agri_app.counters import recount_post_counters
+
+
+def fill_counters(apps, schema_editor):
+    recount_post_counters(apps.get_model('agri_app', 'Post').objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0013_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
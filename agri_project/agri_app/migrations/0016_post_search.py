@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # As for routes: the GIN index and the vectors only exist on PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX agri_app_post_search_gin ON agri_app_post USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "UPDATE agri_app_post SET search_vector = "
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(("
+        "  SELECT string_agg(tag.name, ' ') FROM taggit_taggeditem item"
+        "  JOIN taggit_tag tag ON tag.id = item.tag_id"
+        "  JOIN django_content_type type ON type.id = item.content_type_id"
+        "  WHERE type.app_label = 'agri_app' AND type.model = 'post' AND item.object_id = agri_app_post.id"
+        "), '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(content, '')), 'C')"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS agri_app_post_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0015_threaded_comments'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 16:12
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0016_post_search'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farmer',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='farmer_username_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farmer',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='farmer_email_lower_idx'),
+        ),
+    ]
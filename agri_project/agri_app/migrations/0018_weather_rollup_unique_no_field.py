@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 16:20
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def drop_duplicate_no_field_rollups(apps, schema_editor):
+    # Concurrent refreshes could insert the same no-field bucket twice; keep the newest
+    WeatherRollup = apps.get_model('agri_app', 'WeatherRollup')
+    duplicates = (
+        WeatherRollup.objects.filter(field__isnull=True).order_by()
+        .values('farmer_id', 'bucket', 'bucket_start')
+        .annotate(rows=Count('id'), keep=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        WeatherRollup.objects.filter(
+            farmer_id=row['farmer_id'], field__isnull=True, bucket=row['bucket'], bucket_start=row['bucket_start'],
+        ).exclude(pk=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agri_app', '0017_farmer_login_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_no_field_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='weatherrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('field__isnull', True)), fields=('farmer', 'bucket', 'bucket_start'), name='weather_rollup_unique_no_field'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
 from datetime import date
 from django.contrib.auth.models import AbstractUser
@@ -6,7 +7,9 @@ from django.utils import timezone
 from django.contrib.auth.base_user import BaseUserManager
 from django.conf import settings
 from django.urls import reverse
+from django.contrib.postgres.search import SearchVectorField
 from taggit.managers import TaggableManager
+from .geo import parse_geojson, bounding_box, simplified_levels
 
 
 # Create your models here.
@@ -77,6 +80,11 @@ class Farmer(AbstractUser):
     class Meta:
         verbose_name= 'Farmer'
         verbose_name_plural='Farmers'
+        indexes = [
+            # Case-insensitive sign-in by username or email (see EmailOrUsernameBackend)
+            models.Index(Lower('username'), name='farmer_username_lower_idx'),
+            models.Index(Lower('email'), name='farmer_email_lower_idx'),
+        ]
 
     def __str__(self):
         return self.username or self.email
@@ -90,6 +98,7 @@ class Field(models.Model):
     location = models.CharField(max_length=100, blank=True)
     size_in_hectares = models.FloatField()
     soil_type = models.CharField(max_length=50, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.name} ({self.farmer.username})"
@@ -117,15 +126,24 @@ class Crop(models.Model):
     
     planted_on = models.DateField(default=date.today)
     expected_harvest = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     def __str__(self):
         return  f"{self.name} in {self.fields.name} ({self.status})"
     
     class Meta:
         ordering = ['-planted_on']
+        indexes = [
+            # Crop lists sorted by status and harvest date, per field of the farmer
+            models.Index(fields=['fields', 'status', 'expected_harvest'], name='crop_field_status_idx'),
+            models.Index(fields=['fields', '-planted_on', '-id'], name='crop_field_planted_idx'),
+        ]
 
 #-------------------------
 # Planting Calendar
 #-------------------------
+# Statuses of tasks still to be done
+ACTIVE_ACTIVITY_STATUSES = ['scheduled', 'in_progress']
+
 class Activity(models.Model):
     """
     Represents a scheduled or completed farming activity/task (Planting, Fertilizing, etc.).
@@ -158,6 +176,7 @@ class Activity(models.Model):
         choices=STATUS_CHOICES,
         default='scheduled'
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.title}: {self.field.name if self.field else 'N/A'} ({self.scheduled_date})"
@@ -166,6 +185,14 @@ class Activity(models.Model):
         verbose_name = ("Scheduled Activity")
         verbose_name_plural = ("Scheduled Activities")
         ordering = ['scheduled_date']
+        indexes = [
+            models.Index(fields=['farmer', 'scheduled_date', 'id'], name='activity_farmer_date_idx'),
+            # Open tasks are a small, hot slice of the calendar
+            models.Index(
+                fields=['farmer', 'scheduled_date'], name='activity_farmer_open_idx',
+                condition=models.Q(status__in=ACTIVE_ACTIVITY_STATUSES),
+            ),
+        ]
 #----------------------
 # Weather  Record
 #-----------------------
@@ -206,6 +233,7 @@ class WeatherRecord(models.Model):
         default='manual',
         help_text=("Data source (e.g., manual, API, sensor).")
         )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Weather for {self.field.name if self.field else 'N/A'} at {self.recorded_at.date()}"
@@ -215,6 +243,61 @@ class WeatherRecord(models.Model):
         verbose_name_plural = ("Weather Records")
         ordering = ['-recorded_at']
         unique_together = ('field', 'recorded_at')
+        indexes = [
+            models.Index(fields=['farmer', '-recorded_at', '-id'], name='weather_farmer_recent_idx'),
+        ]
+
+class WeatherRollup(models.Model):
+    """
+    Precomputed weather aggregates for one field over an hour, a day or a month.
+    Maintained by agri_app.rollups whenever readings are saved or deleted.
+    """
+    BUCKET_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+        ('month', 'Monthly'),
+    ]
+    farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name='weather_rollups')
+    field = models.ForeignKey(Field, on_delete=models.CASCADE, related_name='weather_rollups',
+                              null=True, blank=True)
+    bucket = models.CharField(max_length=10, choices=BUCKET_CHOICES)
+    bucket_start = models.DateTimeField(help_text=("Start of the bucket (UTC)."))
+
+    reading_count = models.PositiveIntegerField(default=0)
+    temperature_min = models.FloatField()
+    temperature_max = models.FloatField()
+    # Sums rather than means, so coarser buckets can be built from finer ones
+    temperature_sum = models.FloatField()
+    humidity_sum = models.FloatField()
+    rainfall_total = models.FloatField()
+
+    @property
+    def temperature_mean(self):
+        return self.temperature_sum / self.reading_count if self.reading_count else None
+
+    @property
+    def humidity_mean(self):
+        return self.humidity_sum / self.reading_count if self.reading_count else None
+
+    def __str__(self):
+        return f"{self.get_bucket_display()} weather for {self.field_id or 'N/A'} at {self.bucket_start}"
+
+    class Meta:
+        verbose_name = ("Weather Rollup")
+        verbose_name_plural = ("Weather Rollups")
+        ordering = ['-bucket_start']
+        unique_together = ('farmer', 'field', 'bucket', 'bucket_start')
+        constraints = [
+            # NULLs are distinct in unique_together, so rollups of readings
+            # without a field need their own constraint
+            models.UniqueConstraint(
+                fields=['farmer', 'bucket', 'bucket_start'], condition=models.Q(field__isnull=True),
+                name='weather_rollup_unique_no_field',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['farmer', 'bucket', 'bucket_start']),
+        ]
 #------------------------
 # Route Safety
 #------------------------
@@ -247,16 +330,84 @@ class SecureRoute(models.Model):
     risk_notes = models.TextField(blank=True, 
                                   help_text=("Details on security threats or blockages."))
     
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Bounding box of the GeoJSON, recomputed on save, used to prune spatial queries
+    bbox_min_lon = models.FloatField(null=True, blank=True, editable=False)
+    bbox_min_lat = models.FloatField(null=True, blank=True, editable=False)
+    bbox_max_lon = models.FloatField(null=True, blank=True, editable=False)
+    bbox_max_lat = models.FloatField(null=True, blank=True, editable=False)
+    # Douglas-Peucker simplified geometry per map zoom level, as encoded polylines
+    simplified_paths = models.JSONField(default=dict, blank=True, editable=False)
+    # Weighted tsvector over route_name and risk_notes (PostgreSQL only), kept up to date on save
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"{self.route_name} - {self.get_security_status_display()}"
+
+    def update_geometry(self):
+        """Recomputes the bounding box and simplified paths from route_path_geojson."""
+        parts = parse_geojson(self.route_path_geojson)
+        bbox = bounding_box(parts) or (None, None, None, None)
+        self.bbox_min_lon, self.bbox_min_lat, self.bbox_max_lon, self.bbox_max_lat = bbox
+        self.simplified_paths = simplified_levels(parts) if parts else {}
+
+    def save(self, *args, **kwargs):
+        self.update_geometry()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'route_path_geojson' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {
+                'bbox_min_lon', 'bbox_min_lat', 'bbox_max_lon', 'bbox_max_lat', 'simplified_paths'
+            }
+        super().save(*args, **kwargs)
         
     class Meta:
         verbose_name = ("Secure Transport Route")
         verbose_name_plural = ("Secure Transport Routes")
         ordering = ['-last_updated']
+        indexes = [
+            models.Index(fields=['farmer', 'bbox_min_lon', 'bbox_max_lon']),
+            models.Index(fields=['farmer', 'bbox_min_lat', 'bbox_max_lat']),
+        ]
 
+
+#------------------------
+# Offline sync
+#------------------------
+class Tombstone(models.Model):
+    """
+    Remembers a deleted row so offline clients can drop it on their next sync.
+    """
+    farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name='tombstones')
+    model_name = models.CharField(max_length=50, help_text=("Sync collection, e.g. 'crops'."))
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Deleted {self.model_name} #{self.object_id}"
+
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['farmer', 'deleted_at']),
+        ]
+
+class IdempotencyKey(models.Model):
+    """
+    Stores the result of an offline mutation under its client-generated key, so a
+    replayed operation returns the original result instead of being applied twice.
+    """
+    farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code})"
+
+    class Meta:
+        unique_together = ('farmer', 'key')
     
 class Post(models.Model):
     title = models.CharField(max_length=200)
@@ -268,10 +419,15 @@ class Post(models.Model):
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='comment')
 
     likes = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='comment')
+    # Denormalized counters, kept in step by signals (see recount_post_counters to repair)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Title, tags and content; kept up to date by signals (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     @property
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
     class Meta:
         ordering = ['-created_at']
         
@@ -281,13 +437,40 @@ class Post(models.Model):
     def get_absolute_url(self):
         return reverse('post_detail', kwargs={'pk': self.pk})
     
+# Materialized comment paths: each level is the comment id zero-padded to
+# COMMENT_PATH_STEP digits, so ordering by path lists a thread depth-first
+# and a subtree is one contiguous range. Digits only, as database collations
+# may ignore punctuation when sorting.
+COMMENT_PATH_STEP = 10
+COMMENT_MAX_DEPTH = 20
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-   
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    path = models.CharField(max_length=COMMENT_PATH_STEP * COMMENT_MAX_DEPTH, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ]
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.parent_id:
+            # Replies past the deepest level join their parent's siblings instead
+            if self.parent.depth >= COMMENT_MAX_DEPTH - 1:
+                self.parent = self.parent.parent
+            self.post_id = self.parent.post_id
+        super().save(*args, **kwargs)
+        if not self.path:
+            # The path ends with our own id, known only after the insert
+            prefix = self.parent.path if self.parent_id else ''
+            self.path = prefix + str(self.pk).zfill(COMMENT_PATH_STEP)
+            self.depth = len(self.path) // COMMENT_PATH_STEP - 1
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
 
     def __str__(self):
         return f'Comment by {self.author} on {self.post.title}'
@@ -300,6 +483,9 @@ class Review(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='review_recent_idx'),
+        ]
 
     def __str__(self):
         return f"Review by {self.farmer.username}"
\ No newline at end of file
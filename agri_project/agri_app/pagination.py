@@ -0,0 +1,149 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+# The values of every ordering column of the row the page starts after
+KeysetCursor = namedtuple('KeysetCursor', ['position', 'reverse'])
+
+
+def _json_value(value):
+    # Full precision: DjangoJSONEncoder would cut datetimes to milliseconds
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _invert(ordering):
+    return tuple(name[1:] if name.startswith('-') else '-' + name for name in ordering)
+
+
+def keyset_filter(ordering, position):
+    """
+    Rows strictly after `position` in `ordering`:
+    c1 > v1 OR (c1 = v1 AND c2 > v2) OR ..., each > a < on descending columns.
+    The leading c1 >= v1 lets an index on the first column bound the scan.
+    """
+    names = [name.lstrip('-') for name in ordering]
+    after = Q()
+    for index, name in enumerate(ordering):
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        tie = {names[earlier]: position[earlier] for earlier in range(index)}
+        after |= Q(**tie, **{f'{names[index]}__{lookup}': position[index]})
+    first = 'lte' if ordering[0].startswith('-') else 'gte'
+    return Q(**{f'{names[0]}__{first}': position[0]}) & after
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Default paginator for the API: opaque ?cursor= links, no COUNT(*) and no
+    OFFSET scan, so page N costs the same as page 1.
+
+    Each view sets `ordering` (or get_ordering() when it differs per action)
+    to an indexed column followed by the primary key. The cursor holds the
+    value of every ordering column, so pages continue through ties on dates
+    or ranks with a keyset filter rather than DRF's offset into the tie.
+    Querysets ranked by a search backend are paged in rank order first.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        if hasattr(view, 'get_ordering'):
+            ordering = view.get_ordering()
+        else:
+            ordering = getattr(view, 'ordering', None)
+        ordering = tuple(ordering or self.ordering)
+        if 'rank' in queryset.query.annotations:
+            ordering = ('-rank',) + ordering
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        The query for one page (plus a row that tells whether more follow).
+        Split from set_page so async views can run it with the async ORM.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        # A previous page is read backwards from its first row, then flipped
+        ordering = _invert(self.ordering) if self.cursor and self.cursor.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            if len(self.cursor.position) != len(ordering):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                queryset = queryset.filter(keyset_filter(ordering, self.cursor.position))
+            except (DjangoValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        """Takes the rows page_queryset returned and works out the links; returns the page."""
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.cursor is not None and self.cursor.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        # An empty page past the end has no row to continue from either way
+        if not self.page:
+            self.has_next = self.has_previous = False
+        self.display_page_controls = self.template is not None and (self.has_next or self.has_previous)
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(KeysetCursor(self._position(self.page[-1]), reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(KeysetCursor(self._position(self.page[0]), reverse=True))
+
+    def _position(self, instance):
+        position = []
+        for name in self.ordering:
+            name = name.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            position.append(value if value is None or isinstance(value, (int, float)) else _json_value(value))
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            return KeysetCursor(position=list(data['p']), reverse=bool(data.get('r')))
+        except (BinasciiError, UnicodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        data = {'p': cursor.position}
+        if cursor.reverse:
+            data['r'] = 1
+        encoded = b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
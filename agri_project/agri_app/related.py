@@ -0,0 +1,84 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+
+def _followed_attrs(field):
+    """
+    The part of a field's source path that reaches related objects. The last
+    attribute of a plain field is a column value; related and nested fields
+    need the object itself (except primary keys, which DRF reads from the *_id column).
+    """
+    attrs = field.source_attrs
+    if isinstance(field, (serializers.BaseSerializer, ManyRelatedField)):
+        return attrs
+    if isinstance(field, RelatedField) and not isinstance(field, PrimaryKeyRelatedField):
+        return attrs
+    return attrs[:-1]
+
+
+def _nested(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.Serializer):
+        return field
+    return None
+
+
+def _walk(model, serializer, prefix, prefetching, select, prefetch):
+    for field in serializer.fields.values():
+        nested = _nested(field)
+        if field.source == '*':
+            if nested is not None:
+                _walk(model, nested, prefix, prefetching, select, prefetch)
+            continue
+
+        current, path, many = model, prefix, prefetching
+        for attr in _followed_attrs(field):
+            try:
+                relation = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                # A property or method: whatever it touches is out of reach
+                break
+            if not relation.is_relation or relation.related_model is None:
+                break
+            path = f'{path}__{attr}' if path else attr
+            many = many or relation.many_to_many or relation.one_to_many
+            (prefetch if many else select).add(path)
+            current = relation.related_model
+        else:
+            if nested is not None:
+                _walk(current, nested, path, many, select, prefetch)
+
+
+@lru_cache(maxsize=None)
+def related_paths(serializer_class, model):
+    """
+    (select_related paths, prefetch_related paths) needed to serialize
+    instances of model with serializer_class without a query per row.
+    Worked out from the serializer's dotted sources and nested serializers.
+    """
+    select, prefetch = set(), set()
+    _walk(model, serializer_class(), '', False, select, prefetch)
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+def with_related(queryset, serializer_class):
+    """The queryset with the select_related / prefetch_related calls serializer_class needs."""
+    select, prefetch = related_paths(serializer_class, queryset.model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class AutoRelatedMixin:
+    """
+    Adds the select_related / prefetch_related calls the current action's
+    serializer needs, so list pages run a constant number of queries.
+    """
+    def filter_queryset(self, queryset):
+        return with_related(super().filter_queryset(queryset), self.get_serializer_class())
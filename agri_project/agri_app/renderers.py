@@ -0,0 +1,14 @@
+from rest_framework.renderers import BaseRenderer
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Passes through text already in the Prometheus exposition format."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Errors (e.g. 403 for non-staff users) arrive as a dict
+        return str(data.get('detail', data)).encode(self.charset)
@@ -0,0 +1,169 @@
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Trunc
+from django.utils.dateparse import parse_datetime
+
+from .models import WeatherRecord, WeatherRollup
+
+BUCKETS = ('hour', 'day', 'month')
+
+# Aggregates over raw readings (hour buckets)
+RECORD_AGGREGATES = {
+    'reading_count': Count('id'),
+    'temperature_min': Min('temperature'),
+    'temperature_max': Max('temperature'),
+    'temperature_sum': Sum('temperature'),
+    'humidity_sum': Sum('humidity'),
+    'rainfall_total': Sum('rainfall'),
+}
+
+# Aggregates over the next finer rollup (day from hours, month from days)
+ROLLUP_AGGREGATES = {
+    'reading_count': Sum('reading_count'),
+    'temperature_min': Min('temperature_min'),
+    'temperature_max': Max('temperature_max'),
+    'temperature_sum': Sum('temperature_sum'),
+    'humidity_sum': Sum('humidity_sum'),
+    'rainfall_total': Sum('rainfall_total'),
+}
+
+SOURCE_BUCKET = {'day': 'hour', 'month': 'day'}
+
+
+def bucket_start(moment, bucket):
+    """Truncates an aware datetime to the start of its UTC hour, day or month."""
+    if isinstance(moment, str):
+        # Instances created with string timestamps keep them until reloaded
+        moment = parse_datetime(moment)
+    moment = moment.astimezone(dt_timezone.utc)
+    if bucket == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'day':
+        return day
+    return day.replace(day=1)
+
+
+def bucket_end(start, bucket):
+    if bucket == 'hour':
+        return start + timedelta(hours=1)
+    if bucket == 'day':
+        return start + timedelta(days=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def _scope(farmer_id, field_id):
+    if field_id is None:
+        return {'farmer_id': farmer_id, 'field__isnull': True}
+    return {'farmer_id': farmer_id, 'field_id': field_id}
+
+
+def _refresh_bucket(farmer_id, field_id, bucket, start):
+    end = bucket_end(start, bucket)
+    scope = _scope(farmer_id, field_id)
+
+    if bucket == 'hour':
+        totals = WeatherRecord.objects.filter(
+            recorded_at__gte=start, recorded_at__lt=end, **scope
+        ).aggregate(**RECORD_AGGREGATES)
+    else:
+        totals = WeatherRollup.objects.filter(
+            bucket=SOURCE_BUCKET[bucket], bucket_start__gte=start, bucket_start__lt=end, **scope
+        ).aggregate(**ROLLUP_AGGREGATES)
+
+    lookup = dict(farmer_id=farmer_id, field_id=field_id, bucket=bucket, bucket_start=start)
+    if not totals['reading_count']:
+        WeatherRollup.objects.filter(**lookup).delete()
+        return
+    # A concurrent refresh that inserts first trips the unique constraints, and
+    # update_or_create then updates its row instead
+    WeatherRollup.objects.update_or_create(defaults=totals, **lookup)
+
+
+def refresh_rollups(farmer_id, field_id, moments):
+    """
+    Recomputes the hour, day and month buckets touched by the given reading times.
+
+    Hours are rebuilt from raw readings, days from hours and months from days,
+    so a single saved reading costs a bounded amount of work however long the
+    history is.
+    """
+    hours = {bucket_start(moment, 'hour') for moment in moments}
+    days = {bucket_start(hour, 'day') for hour in hours}
+    months = {bucket_start(day, 'month') for day in days}
+
+    with transaction.atomic():
+        for bucket, starts in (('hour', hours), ('day', days), ('month', months)):
+            for start in sorted(starts):
+                _refresh_bucket(farmer_id, field_id, bucket, start)
+
+
+def refresh_rollups_for_records(records):
+    """Refreshes rollups for a batch of saved readings (e.g. after a bulk upsert)."""
+    moments = defaultdict(set)
+    for record in records:
+        moments[(record.farmer_id, record.field_id)].add(record.recorded_at)
+    for (farmer_id, field_id), timestamps in moments.items():
+        refresh_rollups(farmer_id, field_id, timestamps)
+
+
+def rebuild_rollups(farmers=None, batch_size=1000):
+    """
+    Rebuilds every rollup from scratch with one GROUP BY per bucket level.
+    Used to backfill history; day-to-day updates go through refresh_rollups.
+    """
+    records = WeatherRecord.objects.all()
+    rollups = WeatherRollup.objects.all()
+    if farmers is not None:
+        records = records.filter(farmer__in=farmers)
+        rollups = rollups.filter(farmer__in=farmers)
+    _rebuild(records, rollups, batch_size)
+
+
+def rebuild_unassigned_rollups(farmer_id, batch_size=1000):
+    """
+    Rebuilds the farmer's rollups of readings without a field. Deleting a field
+    moves its readings there with a bare UPDATE (on_delete=SET_NULL), which
+    refresh_rollups never sees.
+    """
+    _rebuild(
+        WeatherRecord.objects.filter(farmer_id=farmer_id, field__isnull=True),
+        WeatherRollup.objects.filter(farmer_id=farmer_id, field__isnull=True),
+        batch_size,
+    )
+
+
+def _rebuild(records, rollups, batch_size):
+    with transaction.atomic():
+        rollups.delete()
+        for bucket in BUCKETS:
+            if bucket == 'hour':
+                source, aggregates, date_field = records, RECORD_AGGREGATES, 'recorded_at'
+            else:
+                source = rollups.filter(bucket=SOURCE_BUCKET[bucket])
+                aggregates, date_field = ROLLUP_AGGREGATES, 'bucket_start'
+
+            grouped = (
+                source.order_by()
+                .annotate(start=Trunc(date_field, bucket, tzinfo=dt_timezone.utc))
+                .values('farmer_id', 'field_id', 'start')
+                .annotate(**aggregates)
+            )
+            batch = []
+            for row in grouped.iterator(chunk_size=batch_size):
+                batch.append(WeatherRollup(
+                    farmer_id=row.pop('farmer_id'),
+                    field_id=row.pop('field_id'),
+                    bucket=bucket,
+                    bucket_start=row.pop('start'),
+                    **row,
+                ))
+                if len(batch) >= batch_size:
+                    WeatherRollup.objects.bulk_create(batch)
+                    batch = []
+            WeatherRollup.objects.bulk_create(batch)
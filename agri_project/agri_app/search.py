@@ -0,0 +1,187 @@
+import re
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector, TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import SecureRoute, Post
+
+# Text search configuration: 'simple' does no stemming, which suits mixed English/French/Swahili notes
+SEARCH_CONFIG = 'simple'
+
+ROUTE_SEARCH_VECTOR = (
+    SearchVector('route_name', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('risk_notes', weight='B', config=SEARCH_CONFIG)
+)
+
+# Minimum trigram similarity for the typo-tolerant fallback (pg_trgm.similarity_threshold)
+TRIGRAM_THRESHOLD = 0.2
+
+
+def uses_postgres_search():
+    return connection.vendor == 'postgresql'
+
+
+def _set_trigram_threshold():
+    # Session-wide, as the queryset is evaluated after this returns
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, false)", [str(TRIGRAM_THRESHOLD)])
+
+
+def update_route_search_vector(route_ids):
+    """Refreshes the stored search vector; a plain UPDATE, so it fires no signals."""
+    if uses_postgres_search():
+        SecureRoute.objects.filter(pk__in=route_ids).update(search_vector=ROUTE_SEARCH_VECTOR)
+
+
+def search_routes(queryset, terms):
+    """
+    Ranked search over route_name and risk_notes.
+
+    On PostgreSQL this matches the stored, GIN-indexed tsvector (name weighted
+    above notes) and falls back to trigram similarity when no word matches,
+    which catches typos and partial names. Other databases get a plain
+    icontains match with name hits ranked first.
+    """
+    if uses_postgres_search():
+        query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+        ranked = (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-last_updated')
+        )
+        if ranked.exists():
+            return ranked
+        # The % operator (trigram_similar) is what the gin_trgm_ops indexes
+        # serve; similarity() is only computed to order the matches
+        _set_trigram_threshold()
+        return (
+            queryset.filter(Q(route_name__trigram_similar=terms) | Q(risk_notes__trigram_similar=terms))
+            .annotate(rank=Greatest(
+                TrigramSimilarity('route_name', terms), TrigramSimilarity('risk_notes', terms)
+            ))
+            .order_by('-rank', '-last_updated')
+        )
+
+    return (
+        queryset.filter(Q(route_name__icontains=terms) | Q(risk_notes__icontains=terms))
+        .annotate(rank=Case(
+            When(route_name__icontains=terms, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        .order_by('-rank', '-last_updated')
+    )
+
+
+#-------------------------
+# Community posts
+#-------------------------
+POST_SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('content', weight='C', config=SEARCH_CONFIG)
+)
+# Tag names go in at weight B; see update_post_search_vector
+POST_TAG_WEIGHT = 'B'
+
+# Headlines come back with these around each match and are escaped before the
+# markers become <mark> tags, as ts_headline does not escape the text itself
+HIGHLIGHT_START, HIGHLIGHT_STOP = '\x02', '\x03'
+HEADLINE_WORDS = 30
+TAG_FACET_LIMIT = 20
+
+
+def _post_tags(post_ids):
+    tagged = Post.tags.through.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post), object_id__in=post_ids
+    )
+    names = defaultdict(list)
+    for post_id, name in tagged.values_list('object_id', 'tag__name'):
+        names[post_id].append(name)
+    return names
+
+
+def update_post_search_vector(post_ids):
+    """Refreshes the stored vector over title, tags and content; plain UPDATEs, so no signals fire."""
+    if not uses_postgres_search():
+        return
+    tags = _post_tags(post_ids)
+    for post_id in post_ids:
+        Post.objects.filter(pk=post_id).update(search_vector=POST_SEARCH_VECTOR + SearchVector(
+            Value(' '.join(tags[post_id])), weight=POST_TAG_WEIGHT, config=SEARCH_CONFIG
+        ))
+
+
+def search_posts(queryset, terms):
+    """
+    Ranked search over post titles, tags and content.
+
+    On PostgreSQL this matches the stored, GIN-indexed tsvector and annotates
+    each post with a headline of its content. Other databases get icontains
+    matches, title hits first, and post_headline builds the excerpt instead.
+    """
+    if uses_postgres_search():
+        query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F('search_vector'), query),
+                headline=SearchHeadline(
+                    'content', query, config=SEARCH_CONFIG, start_sel=HIGHLIGHT_START,
+                    stop_sel=HIGHLIGHT_STOP, max_words=HEADLINE_WORDS, min_words=HEADLINE_WORDS // 2,
+                ),
+            )
+            .order_by('-rank', '-id')
+        )
+
+    tagged = Post.tags.through.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post), tag__name__icontains=terms
+    ).values('object_id')
+    return (
+        queryset.filter(Q(title__icontains=terms) | Q(content__icontains=terms) | Q(pk__in=tagged))
+        .annotate(rank=Case(
+            When(title__icontains=terms, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        .order_by('-rank', '-id')
+    )
+
+
+def post_headline(post, terms):
+    """
+    The highlighted excerpt of a search result as safe HTML, matches in <mark>.
+    Uses the database headline when search_posts could make one.
+    """
+    headline = getattr(post, 'headline', None)
+    if headline is None:
+        words = post.content.split()
+        pattern = re.compile('|'.join(re.escape(term) for term in terms.split()) or '$^', re.IGNORECASE)
+        first = next((index for index, word in enumerate(words) if pattern.search(word)), 0)
+        start = max(0, first - HEADLINE_WORDS // 3)
+        excerpt = ' '.join(words[start:start + HEADLINE_WORDS])
+        headline = pattern.sub(lambda match: HIGHLIGHT_START + match.group() + HIGHLIGHT_STOP, excerpt)
+    return mark_safe(
+        escape(headline).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+    )
+
+
+def post_tag_facets(queryset, limit=TAG_FACET_LIMIT):
+    """Tags of the posts with how many carry each, most common first, in one aggregate query."""
+    facets = (
+        Post.tags.through.objects.filter(
+            content_type=ContentType.objects.get_for_model(Post),
+            object_id__in=queryset.order_by().values('pk'),
+        )
+        .values('tag__name', 'tag__slug')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'tag__name')[:limit]
+    )
+    return [{'name': row['tag__name'], 'slug': row['tag__slug'], 'count': row['count']} for row in facets]
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Farmer, Crop, Field, WeatherRecord, Activity, SecureRoute, Review, Post, Comment
+from .models import Farmer, Crop, Field, WeatherRecord, WeatherRollup, Activity, SecureRoute, Review, Post, Comment
+from .indicators import compute_crop_indicators
+from .search import post_headline
 from django.contrib.auth import get_user_model
 Farmer = get_user_model() 
 
@@ -125,10 +127,35 @@ class CropListSerializer(serializers.ModelSerializer):
 
 class CropDetailSerializer(serializers.ModelSerializer):
     fields = serializers.ReadOnlyField(source='fields.name')
+    indicators = serializers.SerializerMethodField()
     class Meta:
         model = Crop
         fields = '__all__'
 
+    def get_indicators(self, obj):
+        # Growing degree days, rainfall since planting and heat-stress days
+        return compute_crop_indicators([obj])[obj.id]
+
+class CropIndicatorsSerializer(serializers.ModelSerializer):
+    """
+    Crop identity plus indicators that the view computes for the whole batch
+    and passes in through context['indicators'].
+    """
+    indicators = serializers.SerializerMethodField()
+    class Meta:
+        model = Crop
+        fields = [
+            'id',
+            'name',
+            'fields',
+            'status',
+            'planted_on',
+            'indicators'
+        ]
+
+    def get_indicators(self, obj):
+        return self.context['indicators'][obj.id]
+
 class CropCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Crop
@@ -190,21 +217,22 @@ class ActivityCreateUpdateSerializer(serializers.ModelSerializer):
             'description'
 
         ]
-        def validate(self, data):
-            """
-            Cross-field validation: Ensure both Field and Crop belong to the user.
-            """
-            user = self.context['request'].user
+
+    def validate(self, data):
+        """
+        Cross-field validation: Ensure both Field and Crop belong to the user.
+        """
+        user = self.context['request'].user
+    
+        # Check Field ownership
+        if data.get('field') and data['field'].farmer_id != user.id:
+            raise serializers.ValidationError({"field": "This field does not belong to you."})
         
-            # Check Field ownership
-            if data.get('field') and data['field'].farmer != user:
-                raise serializers.ValidationError({"field": "This field does not belong to you."})
-            
-            # Check Crop ownership (assuming Crop relates to Field, which relates to Farmer)
-            if data.get('crop') and data['crop'].field.farmer != user:
-                raise serializers.ValidationError({"crop": "This crop does not belong to your fields."})
-            
-            return data
+        # Check Crop ownership (Crop relates to Field, which relates to Farmer)
+        if data.get('crop') and data['crop'].fields.farmer_id != user.id:
+            raise serializers.ValidationError({"crop": "This crop does not belong to your fields."})
+        
+        return data
 
 
 
@@ -250,12 +278,66 @@ class WeatherRecordCreateUpdateSerializer(serializers.ModelSerializer):
         if value.farmer != user:
             raise serializers.ValidationError("You cannot record weather for a field you do not own.")
         return value
-        
+
+class WeatherRecordBulkItemSerializer(serializers.ModelSerializer):
+    """
+    One reading inside a bulk upload. Field ownership is checked for the
+    whole batch at once by the view, so 'field' is a plain id here.
+    """
+    field = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = WeatherRecord
+        fields =[
+            'recorded_at',
+            'field',
+            'location',
+            'temperature',
+            'humidity',
+            'rainfall',
+            'wind_speed',
+            'source'
+        ]
+        # The (field, recorded_at) pair is upserted, so a re-sent reading must not fail validation
+        validators = []
+
+class WeatherRollupSerializer(serializers.ModelSerializer):
+    temperature_mean = serializers.ReadOnlyField()
+    humidity_mean = serializers.ReadOnlyField()
+    class Meta:
+        model = WeatherRollup
+        fields =[
+            'field',
+            'bucket',
+            'bucket_start',
+            'reading_count',
+            'temperature_min',
+            'temperature_max',
+            'temperature_mean',
+            'humidity_mean',
+            'rainfall_total'
+        ]
+
 
 #----------------------
 # Route Safety Serializers
 #-----------------------
-class SecureRouteListSerializer(serializers.ModelSerializer):
+class SimplifiedRouteMixin:
+    """
+    When the view sets context['route_zoom'] (from ?zoom= or ?simplify=), the route
+    geometry is sent as the precomputed encoded polylines for that zoom level
+    instead of the full GeoJSON.
+    """
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        zoom = self.context.get('route_zoom')
+        if zoom is not None:
+            data.pop('route_path_geojson', None)
+            data['route_zoom'] = zoom
+            data['route_path_polyline'] = instance.simplified_paths.get(str(zoom), [])
+        return data
+
+class SecureRouteListSerializer(SimplifiedRouteMixin, serializers.ModelSerializer):
     class Meta:
         model = SecureRoute
         fields =[
@@ -263,11 +345,11 @@ class SecureRouteListSerializer(serializers.ModelSerializer):
             'route_name', 
             'security_status'
         ]
-class SecureRouteDetailSerializer(serializers.ModelSerializer):
+class SecureRouteDetailSerializer(SimplifiedRouteMixin, serializers.ModelSerializer):
     farmer_name= serializers.ReadOnlyField(source='farmer.username')
     class Meta:
         model = SecureRoute
-        fields ='__all__'
+        exclude = ['simplified_paths', 'search_vector']
 
 class SecureRouteCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -288,16 +370,48 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ['farmer', 'created_at']
         
 class CommentSerializer(serializers.ModelSerializer):
-    farmer_name = serializers.ReadOnlyField(source='farmer.username')
+    farmer_name = serializers.ReadOnlyField(source='author.username')
 
     class Meta:
         model = Comment
         fields = ['id', 'farmer_name', 'content', 'created_at']
 
+class CommentThreadSerializer(CommentSerializer):
+    """A comment with its replies, as assembled by threads.load_thread."""
+    parent = serializers.PrimaryKeyRelatedField(queryset=Comment.objects.all(), required=False, allow_null=True)
+    replies = serializers.SerializerMethodField()
+    has_more_replies = serializers.SerializerMethodField()
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['parent', 'depth', 'replies', 'has_more_replies']
+        read_only_fields = ['depth']
+
+    def get_replies(self, obj):
+        return CommentThreadSerializer(getattr(obj, 'children', []), many=True, context=self.context).data
+
+    def get_has_more_replies(self, obj):
+        return getattr(obj, 'has_more_replies', False)
+
+    def validate_parent(self, value):
+        if value is not None and value.post_id != self.context['post'].pk:
+            raise serializers.ValidationError("The parent comment belongs to another post.")
+        return value
+
 class PostSerializer(serializers.ModelSerializer):
-    # This matches the 'comment_set' to show comments inside the post object
-    comments = CommentSerializer(many=True, read_only=True, source='comment_set')
+    # Comments are reached through the 'comments' related name
+    comments = CommentSerializer(many=True, read_only=True)
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'author', 'created_at', 'comments']
\ No newline at end of file
+        fields = ['id', 'title', 'content', 'author', 'created_at', 'like_count', 'comment_count', 'comments']
+        read_only_fields = ['like_count', 'comment_count']
+
+class PostSearchSerializer(PostSerializer):
+    """A search hit: the post plus its highlighted excerpt (HTML, matches wrapped in <mark>)."""
+    headline = serializers.SerializerMethodField()
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['headline']
+
+    def get_headline(self, obj):
+        return str(post_headline(obj, self.context['search_terms']))
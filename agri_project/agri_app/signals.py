@@ -1,7 +1,16 @@
-from django.db.models.signals import post_save
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import Group
-from .models import Farmer
+from django.utils import timezone
+from .models import Farmer, Field, Crop, Activity, WeatherRecord, SecureRoute, Tombstone, Post, Comment, Review
+from .rollups import refresh_rollups, rebuild_unassigned_rollups
+from .sync import COLLECTION_BY_MODEL, farmer_id_for
+from .search import update_route_search_vector, update_post_search_vector
+from .cache import bump_versions, invalidate_home_content, invalidate_review_eligibility
+from .counters import recount_post_likes
+from .authentication import invalidate_token
+from rest_framework.authtoken.models import Token
 
 @receiver(post_save, sender=Farmer)
 def assign_default_privileges(sender, instance, created, **kwargs):
@@ -14,4 +23,174 @@ def assign_default_privileges(sender, instance, created, **kwargs):
         else:
             # Maybe assign to a 'Pending' group with limited access
             group, _ = Group.objects.get_or_create(name='Unverified User')
-            instance.groups.add(group)
\ No newline at end of file
+            instance.groups.add(group)
+
+#-------------------------
+# Weather rollups
+#-------------------------
+@receiver(pre_save, sender=WeatherRecord)
+def remember_previous_weather_bucket(sender, instance, raw, **kwargs):
+    # An edit can move a reading to another field or hour, so the old bucket needs a refresh too
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = WeatherRecord.objects.filter(pk=instance.pk).values_list(
+            'farmer_id', 'field_id', 'recorded_at'
+        ).first()
+
+@receiver(post_save, sender=WeatherRecord)
+def update_weather_rollups(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    refresh_rollups(instance.farmer_id, instance.field_id, [instance.recorded_at])
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous and previous != (instance.farmer_id, instance.field_id, instance.recorded_at):
+        farmer_id, field_id, recorded_at = previous
+        refresh_rollups(farmer_id, field_id, [recorded_at])
+
+@receiver(post_delete, sender=WeatherRecord)
+def remove_from_weather_rollups(sender, instance, **kwargs):
+    refresh_rollups(instance.farmer_id, instance.field_id, [instance.recorded_at])
+
+@receiver(post_delete, sender=Field)
+def regroup_weather_losing_field(sender, instance, origin=None, **kwargs):
+    # The field's readings are now field=None; their rollups went with the field (CASCADE)
+    if isinstance(origin, Farmer) or (isinstance(origin, QuerySet) and origin.model is Farmer):
+        return
+    rebuild_unassigned_rollups(instance.farmer_id)
+
+#-------------------------
+# Offline sync tombstones
+#-------------------------
+@receiver(pre_delete, sender=Field)
+@receiver(pre_delete, sender=Crop)
+@receiver(pre_delete, sender=Activity)
+@receiver(pre_delete, sender=WeatherRecord)
+@receiver(pre_delete, sender=SecureRoute)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Deleting the farmer removes their tombstones as well, so there is nothing to record
+    if isinstance(origin, Farmer) or (isinstance(origin, QuerySet) and origin.model is Farmer):
+        return
+    farmer_id = farmer_id_for(instance)
+    if farmer_id is not None:
+        Tombstone.objects.create(
+            farmer_id=farmer_id, model_name=COLLECTION_BY_MODEL[sender], object_id=instance.pk
+        )
+
+@receiver(pre_delete, sender=Field)
+def touch_weather_losing_field(sender, instance, **kwargs):
+    # on_delete=SET_NULL is a bare UPDATE; bump updated_at so clients see field=None
+    WeatherRecord.objects.filter(field=instance).update(updated_at=timezone.now())
+
+@receiver(pre_delete, sender=Crop)
+def touch_activities_losing_crop(sender, instance, **kwargs):
+    Activity.objects.filter(crop=instance).update(updated_at=timezone.now())
+
+#-------------------------
+# Route search
+#-------------------------
+@receiver(post_save, sender=SecureRoute)
+def refresh_route_search_vector(sender, instance, raw, **kwargs):
+    if not raw:
+        update_route_search_vector([instance.pk])
+
+@receiver(post_save, sender=Post)
+def refresh_post_search_vector(sender, instance, raw, **kwargs):
+    if not raw:
+        update_post_search_vector([instance.pk])
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_post_search_vector_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    # The tagged-item table is shared by every taggable model
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, Post):
+        update_post_search_vector([instance.pk])
+
+#-------------------------
+# Per-farmer cache versions
+#-------------------------
+@receiver(post_save, sender=Field)
+@receiver(post_save, sender=Crop)
+@receiver(post_save, sender=Activity)
+@receiver(post_save, sender=WeatherRecord)
+@receiver(post_save, sender=SecureRoute)
+@receiver(post_delete, sender=Field)
+@receiver(post_delete, sender=Crop)
+@receiver(post_delete, sender=Activity)
+@receiver(post_delete, sender=WeatherRecord)
+@receiver(post_delete, sender=SecureRoute)
+def bump_farmer_cache_version(sender, instance, **kwargs):
+    farmer_id = farmer_id_for(instance)
+    if farmer_id is not None:
+        bump_versions(farmer_id, sender._meta.model_name)
+
+#-------------------------
+# Home page cache
+#-------------------------
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Review)
+def refresh_home_content(sender, instance, **kwargs):
+    invalidate_home_content()
+    if sender is Review:
+        invalidate_review_eligibility(instance.farmer_id)
+
+#-------------------------
+# Post like and comment counters
+#-------------------------
+@receiver(m2m_changed, sender=Post.likes.through)
+def update_post_like_count(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse=False: post.likes.add/remove/clear(), pk_set holds farmer ids;
+    # reverse=True: farmer.comment.add/remove/clear(), pk_set holds post ids.
+    # Django narrows pk_set to the new rows on add but not to the existing ones
+    # on remove, so those are looked up before the rows go
+    if action == 'pre_remove' and pk_set:
+        if reverse:
+            removed = sender.objects.filter(farmer=instance, post__in=pk_set).values_list('post_id', flat=True)
+        else:
+            removed = sender.objects.filter(post=instance, farmer__in=pk_set).values_list('farmer_id', flat=True)
+        instance._unliked_ids = list(removed)
+    elif action in ('post_add', 'post_remove'):
+        changed = pk_set if action == 'post_add' else instance.__dict__.pop('_unliked_ids', [])
+        if not changed:
+            return
+        step = 1 if action == 'post_add' else -1
+        if reverse:
+            Post.objects.filter(pk__in=changed).update(like_count=F('like_count') + step)
+        else:
+            Post.objects.filter(pk=instance.pk).update(like_count=F('like_count') + step * len(changed))
+    elif action == 'pre_clear' and reverse:
+        instance._liked_post_ids = list(sender.objects.filter(farmer=instance).values_list('post_id', flat=True))
+    elif action == 'post_clear':
+        # A clear names no rows, so the affected posts are recounted
+        post_ids = instance.__dict__.pop('_liked_post_ids', []) if reverse else [instance.pk]
+        recount_post_likes(Post.objects.filter(pk__in=post_ids))
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(comment_count=F('comment_count') + 1)
+
+@receiver(post_delete, sender=Comment)
+def uncount_deleted_comment(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(comment_count=F('comment_count') - 1)
+
+#-------------------------
+# Cached API tokens
+#-------------------------
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def forget_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+@receiver(post_save, sender=Farmer)
+def forget_cached_farmer_tokens(sender, instance, created, update_fields=None, **kwargs):
+    # Cached tokens carry is_active and each process's copy of the user, so deactivation
+    # and profile edits must reach them; logins only touch last_login
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
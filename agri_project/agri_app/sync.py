@@ -0,0 +1,96 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+from .models import Field, Crop, Activity, WeatherRecord, SecureRoute, Tombstone
+
+SyncCollection = namedtuple('SyncCollection', ['model', 'owner', 'modified', 'fields'])
+
+# Everything an offline client mirrors, keyed by the name used in the sync payload
+SYNC_COLLECTIONS = {
+    'fields': SyncCollection(
+        Field, 'farmer', 'updated_at',
+        ['id', 'name', 'location', 'size_in_hectares', 'soil_type', 'updated_at'],
+    ),
+    'crops': SyncCollection(
+        Crop, 'fields__farmer', 'updated_at',
+        ['id', 'name', 'description', 'category', 'fields', 'status', 'planted_on',
+         'expected_harvest', 'updated_at'],
+    ),
+    'activities': SyncCollection(
+        Activity, 'farmer', 'updated_at',
+        ['id', 'title', 'description', 'field', 'crop', 'scheduled_date',
+         'estimated_harvest_date', 'status', 'updated_at'],
+    ),
+    'weather': SyncCollection(
+        WeatherRecord, 'farmer', 'updated_at',
+        ['id', 'field', 'recorded_at', 'location', 'temperature', 'humidity', 'rainfall',
+         'wind_speed', 'source', 'updated_at'],
+    ),
+    'secure_routes': SyncCollection(
+        SecureRoute, 'farmer', 'last_updated',
+        ['id', 'route_name', 'route_path_geojson', 'security_status', 'risk_notes', 'last_updated'],
+    ),
+}
+
+COLLECTION_BY_MODEL = {collection.model: name for name, collection in SYNC_COLLECTIONS.items()}
+
+# The next cursor is moved back by this much so rows committed by slower,
+# concurrent transactions are not skipped. Clients upsert, so repeats are harmless.
+SYNC_SAFETY_WINDOW = timedelta(seconds=30)
+# Tombstones older than this are pruned; older cursors get a full resync
+TOMBSTONE_RETENTION = timedelta(days=90)
+# A first sync only carries recent weather; older history is in rollups and exports
+SYNC_INITIAL_WEATHER_DAYS = 30
+
+
+def encode_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(cursor):
+    """Raises ValueError for anything that is not a cursor returned by encode_cursor."""
+    return datetime.fromtimestamp(int(cursor) / 1_000_000, tz=dt_timezone.utc)
+
+
+def farmer_id_for(instance):
+    """Owner of a synced row; crops are owned through their field."""
+    if isinstance(instance, Crop):
+        return Field.objects.filter(pk=instance.fields_id).values_list('farmer_id', flat=True).first()
+    return instance.farmer_id
+
+
+def build_sync_payload(farmer, since=None):
+    """
+    Rows created or updated after `since` plus ids deleted after it, for every
+    synced collection, with the cursor the client should send next time.
+    """
+    started_at = timezone.now()
+    reset = since is None or since < started_at - TOMBSTONE_RETENTION
+    if reset:
+        since = None
+
+    changes = {}
+    for name, collection in SYNC_COLLECTIONS.items():
+        queryset = collection.model.objects.filter(**{collection.owner: farmer})
+        if since is not None:
+            queryset = queryset.filter(**{f'{collection.modified}__gte': since})
+        elif name == 'weather':
+            queryset = queryset.filter(
+                recorded_at__gte=started_at - timedelta(days=SYNC_INITIAL_WEATHER_DAYS)
+            )
+        changes[name] = list(queryset.order_by(collection.modified).values(*collection.fields))
+
+    deleted = {name: [] for name in SYNC_COLLECTIONS}
+    if since is not None:
+        tombstones = Tombstone.objects.filter(farmer=farmer, deleted_at__gte=since)
+        for model_name, object_id in tombstones.values_list('model_name', 'object_id'):
+            deleted[model_name].append(object_id)
+
+    return {
+        'cursor': encode_cursor(started_at - SYNC_SAFETY_WINDOW),
+        'reset': reset,
+        'changes': changes,
+        'deleted': deleted,
+    }
@@ -1,14 +1,37 @@
 from django.urls import reverse
 from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
 from rest_framework import status
-from django.contrib.auth import get_user_model
-from .models import Field, Crop, Activity, WeatherRecord, SecureRoute
+from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from .authentication import CachedTokenAuthentication, local_tokens, _token_cache_key
+from django.core.management import call_command
+from django.db import connection, transaction, IntegrityError
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from .models import Field, Crop, Activity, WeatherRecord, WeatherRollup, SecureRoute, Post, Comment, Review
+from .geo import decode_polyline
+from .indicators import compute_crop_indicators
+from .search import search_routes
 import json
+from io import StringIO
+from pathlib import Path
+import tempfile
+import time
+from unittest import mock, skipUnless
 Farmer = get_user_model()
 
+# A single process, so per-process memory is shared enough and keeps the
+# query counts free of cache-table queries
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
 class AgriProjectFullTest(APITestCase):
     
     def setUp(self):
+        # Cached responses would otherwise outlive each test's rolled-back rows
+        cache.clear()
+        local_tokens.clear()
+
         # 1. Create Farmers
         self.farmer_a = Farmer.objects.create_user(
             username='farmer_a', email='a@test.com', password='password123'
@@ -28,6 +51,23 @@ class AgriProjectFullTest(APITestCase):
         self.field_a = Field.objects.create(name="Alpha", farmer=self.farmer_a, size_in_hectares=5)
         self.field_b = Field.objects.create(name="Beta", farmer=self.farmer_b, size_in_hectares=10)
 
+    def assertConstantQueries(self, url, add_row, extra_rows=3):
+        """Fails when a list endpoint's query count grows with its rows (an N+1)."""
+        # Warms the token cache, so both measured requests authenticate alike
+        self.client.get(url)
+        add_row()
+        with CaptureQueriesContext(connection) as one_row:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        for _ in range(extra_rows):
+            add_row()
+        with CaptureQueriesContext(connection) as more_rows:
+            response = self.client.get(url)
+        self.assertEqual(
+            len(more_rows), len(one_row),
+            "\n".join(query['sql'] for query in more_rows.captured_queries),
+        )
+        return response
+
     def test_farmer_list_visibility(self):
         url = reverse('farmer-list')
         response = self.client.get(url)
@@ -36,7 +76,7 @@ class AgriProjectFullTest(APITestCase):
     def test_field_isolation(self):
         url = reverse('field-list')
         response = self.client.get(url)
-        self.assertEqual(len(response.data), 1) # Only see Alpha
+        self.assertEqual(len(response.data['results']), 1) # Only see Alpha
 
     def test_crop_creation_security(self):
         url = reverse('crop-list')
@@ -60,7 +100,7 @@ class AgriProjectFullTest(APITestCase):
         )
         url = f"{reverse('activity-list')}?search=Harvest"
         response = self.client.get(url)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_weather_post_assignment(self):
         # Changed to lowercase 'weatherrecord'
@@ -100,4 +140,702 @@ class AgriProjectFullTest(APITestCase):
         if response.status_code != 201:
             print(f"\nSECURE ROUTE VALIDATION ERROR: {response.data}")
             
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_weather_bulk_upsert(self):
+        url = reverse('weather-record-bulk')
+        readings = [
+            {"recorded_at": "2025-12-29T10:00:00Z", "field": self.field_a.id,
+             "temperature": 25.0, "humidity": 60.0, "rainfall": 0.0},
+            {"recorded_at": "2025-12-29T11:00:00Z", "field": self.field_a.id,
+             "temperature": 27.0, "humidity": 55.0, "rainfall": 1.5},
+        ]
+        response = self.client.post(url, readings, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['summary']['created'], 2)
+
+        # Re-sending a reading updates it instead of failing on unique_together
+        readings[0]['temperature'] = 26.0
+        response = self.client.post(url, readings[:1], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['results'][0]['status'], 'updated')
+        self.assertEqual(WeatherRecord.objects.filter(farmer=self.farmer_a).count(), 2)
+        self.assertEqual(
+            WeatherRecord.objects.get(field=self.field_a, recorded_at="2025-12-29T10:00:00Z").temperature, 26.0
+        )
+
+    def test_weather_bulk_ndjson_rejects_foreign_field(self):
+        url = reverse('weather-record-bulk')
+        lines = [
+            {"recorded_at": "2025-12-29T10:00:00Z", "field": self.field_a.id,
+             "temperature": 25.0, "humidity": 60.0, "rainfall": 0.0},
+            {"recorded_at": "2025-12-29T10:00:00Z", "field": self.field_b.id,
+             "temperature": 25.0, "humidity": 60.0, "rainfall": 0.0},
+        ]
+        body = "\n".join(json.dumps(line) for line in lines)
+        response = self.client.post(url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'][0]['status'], 'created')
+        self.assertEqual(response.data['results'][1]['status'], 'error')
+        self.assertFalse(WeatherRecord.objects.filter(field=self.field_b).exists())
+
+    def test_weather_rollups_follow_saved_readings(self):
+        for hour, temperature, rainfall in ((6, 18.0, 0.0), (12, 30.0, 2.0), (18, 24.0, 4.0)):
+            WeatherRecord.objects.create(
+                farmer=self.farmer_a, field=self.field_a,
+                recorded_at=f"2025-12-29T{hour:02d}:00:00Z",
+                temperature=temperature, humidity=50.0, rainfall=rainfall,
+            )
+        url = f"{reverse('weather-record-rollups')}?bucket=day&field={self.field_a.id}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        day = response.data['results'][0]
+        self.assertEqual(day['reading_count'], 3)
+        self.assertEqual(day['temperature_min'], 18.0)
+        self.assertEqual(day['temperature_max'], 30.0)
+        self.assertEqual(day['temperature_mean'], 24.0)
+        self.assertEqual(day['rainfall_total'], 6.0)
+
+        # Deleting a reading shrinks the hourly, daily and monthly buckets
+        WeatherRecord.objects.get(recorded_at="2025-12-29T12:00:00Z").delete()
+        response = self.client.get(f"{reverse('weather-record-rollups')}?bucket=month")
+        self.assertEqual(response.data['results'][0]['reading_count'], 2)
+        self.assertEqual(response.data['results'][0]['temperature_max'], 24.0)
+
+    def test_weather_rollups_without_field_are_unique_and_follow_field_deletes(self):
+        WeatherRecord.objects.create(farmer=self.farmer_a, recorded_at="2025-12-29T06:00:00Z",
+                                     temperature=20.0, humidity=50.0, rainfall=1.0)
+        plot = Field.objects.create(name="Gamma", farmer=self.farmer_a, size_in_hectares=1)
+        WeatherRecord.objects.create(farmer=self.farmer_a, field=plot, recorded_at="2025-12-29T07:00:00Z",
+                                     temperature=30.0, humidity=50.0, rainfall=3.0)
+        no_field = WeatherRollup.objects.filter(farmer=self.farmer_a, field__isnull=True)
+        self.assertEqual(no_field.get(bucket='day').reading_count, 1)
+
+        # The readings of a deleted field join the no-field rollups
+        plot.delete()
+        day = no_field.get(bucket='day')
+        self.assertEqual((day.reading_count, day.temperature_max, day.rainfall_total), (2, 30.0, 4.0))
+        self.assertEqual(no_field.filter(bucket='hour').count(), 2)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            WeatherRollup.objects.create(
+                farmer=self.farmer_a, bucket='day', bucket_start=day.bucket_start, reading_count=1,
+                temperature_min=0, temperature_max=0, temperature_sum=0, humidity_sum=0, rainfall_total=0,
+            )
+
+    def test_weather_export_streams_csv_and_ndjson(self):
+        for day in (1, 2, 3):
+            WeatherRecord.objects.create(
+                farmer=self.farmer_a, field=self.field_a,
+                recorded_at=f"2025-12-0{day}T08:00:00Z",
+                temperature=20.0 + day, humidity=50.0, rainfall=0.0,
+            )
+        url = reverse('weather-record-export')
+        response = self.client.get(f"{url}?fmt=csv&start=2025-12-02&end=2025-12-03")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'field_id', 'recorded_at'])
+        self.assertEqual(len(lines), 3) # Header plus Dec 2 and Dec 3
+
+        response = self.client.get(f"{url}?fmt=ndjson&field={self.field_a.id}")
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['temperature'] for row in rows], [21.0, 22.0, 23.0])
+
+    def test_crop_indicators(self):
+        crop = Crop.objects.create(
+            name="Maize", category="Cereal", fields=self.field_a, planted_on="2025-12-01"
+        )
+        readings = [
+            ("2025-11-30T12:00:00Z", 40.0, 9.0),  # Before planting, ignored
+            ("2025-12-01T06:00:00Z", 16.0, 1.0),
+            ("2025-12-01T14:00:00Z", 24.0, 2.0),  # Day 1: mean 20 -> 10 GDD
+            ("2025-12-02T06:00:00Z", 20.0, 0.0),
+            ("2025-12-02T14:00:00Z", 36.0, 0.5),  # Day 2: mean 28 -> 18 GDD, heat stress
+        ]
+        for recorded_at, temperature, rainfall in readings:
+            WeatherRecord.objects.create(
+                farmer=self.farmer_a, field=self.field_a, recorded_at=recorded_at,
+                temperature=temperature, humidity=50.0, rainfall=rainfall,
+            )
+
+        response = self.client.get(f"{reverse('crop-indicators')}?ids={crop.id}")
+        self.assertEqual(response.status_code, 200)
+        indicators = response.data[0]['indicators']
+        self.assertEqual(indicators['growing_degree_days'], 28.0)
+        self.assertEqual(indicators['rainfall_since_planting'], 3.5)
+        self.assertEqual(indicators['heat_stress_days'], 1)
+        self.assertEqual(indicators['days_with_readings'], 2)
+
+        response = self.client.get(reverse('crop-detail', args=[crop.id]))
+        self.assertEqual(response.data['indicators'], indicators)
+
+        # Built from the daily rollups, never from raw readings
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(compute_crop_indicators([Crop.objects.get(pk=crop.pk)])[crop.id], indicators)
+        self.assertNotIn('agri_app_weatherrecord', ' '.join(query['sql'] for query in queries))
+
+    def test_delta_sync_returns_changes_and_tombstones(self):
+        crop = Crop.objects.create(name="Beans", category="Legume", fields=self.field_a)
+        response = self.client.get(reverse('sync'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['reset'])
+        self.assertEqual([row['id'] for row in response.data['changes']['crops']], [crop.id])
+        self.assertEqual([row['id'] for row in response.data['changes']['fields']], [self.field_a.id])
+
+        cursor = response.data['cursor']
+        crop_id = crop.id
+        crop.delete()
+        activity = Activity.objects.create(
+            title="Weeding", field=self.field_a, farmer=self.farmer_a, scheduled_date="2025-12-30"
+        )
+        response = self.client.get(f"{reverse('sync')}?since={cursor}")
+        self.assertFalse(response.data['reset'])
+        self.assertEqual(response.data['deleted']['crops'], [crop_id])
+        self.assertEqual([row['id'] for row in response.data['changes']['activities']], [activity.id])
+        # Farmer B's rows never leak into farmer A's sync
+        self.assertNotIn(self.field_b.id, [row['id'] for row in response.data['changes']['fields']])
+
+        response = self.client.get(f"{reverse('sync')}?since=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_mutations_are_idempotent(self):
+        crop = Crop.objects.create(name="Cassava", category="Root", fields=self.field_a)
+        operations = [
+            {"key": "op-1", "op": "create", "resource": "activities",
+             "data": {"title": "Weeding", "field": self.field_a.id, "scheduled_date": "2025-12-30"}},
+            {"key": "op-2", "op": "update", "resource": "crops", "id": crop.id,
+             "data": {"status": "growing"}},
+            {"key": "op-3", "op": "create", "resource": "weather",
+             "data": {"recorded_at": "2025-12-29T10:00:00Z", "field": self.field_b.id,
+                      "temperature": 25.0, "humidity": 60.0, "rainfall": 0.0}},
+        ]
+        response = self.client.post(reverse('batch'), {"operations": operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 200, 400])
+        self.assertEqual(Activity.objects.get().farmer, self.farmer_a)
+
+        # Replaying the queue does not create the activity twice
+        response = self.client.post(reverse('batch'), {"operations": operations[:2]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(all(result['replayed'] for result in response.data['results']))
+        self.assertEqual(Activity.objects.count(), 1)
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        operations = [
+            {"key": "a-1", "op": "create", "resource": "activities",
+             "data": {"title": "Weeding", "field": self.field_a.id, "scheduled_date": "2025-12-30"}},
+            {"key": "a-2", "op": "delete", "resource": "crops", "id": 999999},
+        ]
+        response = self.client.post(reverse('batch'), {"atomic": True, "operations": operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(response.data['results'][0]['rolled_back'])
+        self.assertEqual(response.data['results'][1]['status'], 404)
+        self.assertFalse(Activity.objects.exists())
+
+    def test_secure_route_spatial_queries(self):
+        # Goma is at roughly (-1.68, 29.23); one route passes through it, one is far south
+        near = SecureRoute.objects.create(
+            farmer=self.farmer_a, route_name="Goma road",
+            route_path_geojson=json.dumps({"type": "LineString", "coordinates": [[29.10, -1.68], [29.40, -1.68]]}),
+        )
+        far = SecureRoute.objects.create(
+            farmer=self.farmer_a, route_name="Bukavu road",
+            route_path_geojson=json.dumps({"type": "Point", "coordinates": [28.86, -2.50]}),
+        )
+        self.assertEqual((near.bbox_min_lon, near.bbox_max_lon), (29.10, 29.40))
+
+        url = reverse('secure-route-list')
+        response = self.client.get(f"{url}?near=-1.70,29.23&radius=5")
+        self.assertEqual([route['id'] for route in response.data['results']], [near.id])
+
+        response = self.client.get(f"{url}?bbox=28.5,-3.0,29.0,-2.0")
+        self.assertEqual([route['id'] for route in response.data['results']], [far.id])
+
+        response = self.client.get(f"{url}?near=abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_secure_route_simplified_geometry(self):
+        # A straight road drawn with 200 vertices collapses to its two end points
+        coordinates = [[29.0 + i * 0.001, -1.68] for i in range(200)]
+        route = SecureRoute.objects.create(
+            farmer=self.farmer_a, route_name="Straight road",
+            route_path_geojson=json.dumps({"type": "LineString", "coordinates": coordinates}),
+        )
+        response = self.client.get(f"{reverse('secure-route-detail', args=[route.id])}?zoom=10")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('route_path_geojson', response.data)
+        self.assertEqual(response.data['route_zoom'], 12)
+        [polyline] = response.data['route_path_polyline']
+        self.assertEqual(decode_polyline(polyline), [(29.0, -1.68), (29.199, -1.68)])
+
+        response = self.client.get(f"{reverse('secure-route-list')}?simplify=coarse")
+        self.assertEqual(response.data['results'][0]['route_path_polyline'], route.simplified_paths['8'])
+
+    def test_secure_route_search_ranks_name_matches_first(self):
+        geometry = json.dumps({"type": "Point", "coordinates": [29.23, -1.68]})
+        by_notes = SecureRoute.objects.create(
+            farmer=self.farmer_a, route_name="Sake road", route_path_geojson=geometry,
+            risk_notes="Checkpoint near the Goma turn-off", security_status='red',
+        )
+        by_name = SecureRoute.objects.create(
+            farmer=self.farmer_a, route_name="Goma market road", route_path_geojson=geometry,
+        )
+        SecureRoute.objects.create(farmer=self.farmer_a, route_name="Bukavu road", route_path_geojson=geometry)
+
+        url = reverse('secure-route-list')
+        response = self.client.get(f"{url}?search=goma")
+        self.assertEqual([route['id'] for route in response.data['results']], [by_name.id, by_notes.id])
+
+        # Coordinates are no longer searched
+        response = self.client.get(f"{url}?search=29.23")
+        self.assertEqual(response.data['results'], [])
+
+        response = self.client.get(f"{url}?search=goma&security_status=red")
+        self.assertEqual([route['id'] for route in response.data['results']], [by_notes.id])
+
+    @skipUnless(connection.vendor == 'postgresql', "Trigram search needs PostgreSQL")
+    def test_secure_route_typo_search_uses_the_trigram_indexes(self):
+        geometry = json.dumps({"type": "Point", "coordinates": [29.23, -1.68]})
+        route = SecureRoute.objects.create(
+            farmer=self.farmer_a, route_name="Goma market road", route_path_geojson=geometry,
+        )
+        SecureRoute.objects.create(farmer=self.farmer_a, route_name="Bukavu road", route_path_geojson=geometry)
+
+        response = self.client.get(reverse('secure-route-list'), {'search': "goma markit"})
+        self.assertEqual([result['id'] for result in response.data['results']], [route.id])
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = search_routes(SecureRoute.objects.all(), "goma markit").explain()
+        self.assertIn('agri_app_secureroute_name_trgm', plan)
+
+    def test_farmer_responses_are_cached_until_data_changes(self):
+        url = reverse('field-list')
+        self.assertEqual(self.client.get(url).data['results'][0]['name'], "Alpha")
+
+        # The ETag comes from the cached versions and the token is cached too
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['results'][0]['name'], "Alpha")
+
+        self.field_a.name = "Alpha North"
+        self.field_a.save()
+        self.assertEqual(self.client.get(url).data['results'][0]['name'], "Alpha North")
+
+        # Another farmer's edits leave this cache alone
+        self.field_b.save()
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_conditional_get_returns_not_modified(self):
+        crop = Crop.objects.create(name="Maize", category="Cereal", fields=self.field_a)
+        url = reverse('crop-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+        # Renaming the field changes the rendered field_name, so the validator changes too
+        self.field_a.name = "Alpha West"
+        self.field_a.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['field_name'], "Alpha West")
+
+        # Deleting a reading changes no crop row, but the detail's indicators
+        reading = WeatherRecord.objects.create(farmer=self.farmer_a, field=self.field_a, temperature=30.0,
+                                               humidity=50.0, rainfall=0.0)
+        detail_url = reverse('crop-detail', args=[crop.id])
+        response = self.client.get(detail_url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        time.sleep(1)  # Last-Modified has one-second resolution
+        reading.delete()
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        crop.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+    def test_weather_list_uses_cursor_pagination(self):
+        for day in range(1, 6):
+            WeatherRecord.objects.create(
+                farmer=self.farmer_a, field=self.field_a, recorded_at=f"2025-12-{day:02d}T06:00:00Z",
+                temperature=20.0, humidity=50.0, rainfall=0.0,
+            )
+        response = self.client.get(f"{reverse('weather-record-list')}?page_size=2")
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        seen = [row['id'] for row in response.data['results']]
+
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [row['id'] for row in response.data['results']]
+
+        newest_first = WeatherRecord.objects.order_by('-recorded_at').values_list('id', flat=True)
+        self.assertEqual(seen, list(newest_first))
+
+    def test_cursor_pagination_walks_through_tied_dates(self):
+        for number in range(7):
+            Activity.objects.create(title=f"Task {number}", field=self.field_a, farmer=self.farmer_a,
+                                    scheduled_date='2026-03-01' if number < 6 else '2026-02-01')
+        expected = list(Activity.objects.order_by('scheduled_date', 'id').values_list('id', flat=True))
+
+        pages = [self.client.get(reverse('activity-list'), {'page_size': 2}).data]
+        while pages[-1]['next']:
+            pages.append(self.client.get(pages[-1]['next']).data)
+        self.assertEqual([row['id'] for page in pages for row in page['results']], expected)
+        self.assertEqual(len(pages), 4)
+
+        # And back again from the last page
+        backwards = [pages[-1]]
+        while backwards[-1]['previous']:
+            backwards.append(self.client.get(backwards[-1]['previous']).data)
+        self.assertEqual([[row['id'] for row in page['results']] for page in backwards],
+                         [[row['id'] for row in page['results']] for page in reversed(pages)])
+
+        self.assertEqual(self.client.get(reverse('activity-list'), {'cursor': 'bm9wZQ=='}).status_code, 404)
+
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_hot_queries', '--strict', farmer=self.farmer_a.id, stdout=out)
+        self.assertIn("hot queries use indexes", out.getvalue())
+
+    def test_list_endpoints_run_constant_queries(self):
+        crop = Crop.objects.create(name="Maize", category="Cereal", fields=self.field_a)
+        self.assertConstantQueries(
+            reverse('crop-list'),
+            lambda: Crop.objects.create(name="Beans", category="Legume", fields=self.field_a),
+        )
+        self.assertConstantQueries(
+            reverse('activity-list'),
+            lambda: Activity.objects.create(
+                title="Weeding", field=self.field_a, crop=crop, farmer=self.farmer_a, scheduled_date="2025-12-30"
+            ),
+        )
+        readings = iter(range(1, 29))
+        self.assertConstantQueries(
+            reverse('weather-record-list'),
+            lambda: WeatherRecord.objects.create(
+                farmer=self.farmer_a, field=self.field_a, recorded_at=f"2025-11-{next(readings):02d}T06:00:00Z",
+                temperature=20.0, humidity=50.0, rainfall=0.0,
+            ),
+        )
+
+    def test_metrics_endpoint_reports_request_histograms(self):
+        self.client.get(reverse('crop-list'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.farmer_a.is_staff = True
+        self.farmer_a.save()
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('agri_requests_total{route="crop-list",method="GET",status="200"}', body)
+        self.assertIn('agri_request_queries_count{route="crop-list",method="GET"}', body)
+
+    def test_generated_data_benchmarks_against_baseline(self):
+        call_command(
+            'generate_farm_data', farmers=2, fields_per_farmer=2, crops_per_field=3,
+            readings_per_field=24, routes_per_farmer=1, stdout=StringIO(),
+        )
+        self.assertEqual(Farmer.objects.filter(username__startswith='bench_').count(), 2)
+        self.assertEqual(Crop.objects.filter(fields__farmer__username__startswith='bench_').count(), 12)
+
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = Path(directory) / 'baseline.json'
+            options = {'only': ['api.crop', 'web.crop'], 'repeat': 2, 'warmup': 0, 'baseline': baseline}
+            call_command('run_benchmarks', save_baseline=True, stdout=StringIO(), **options)
+            self.assertIn('api.crop-list', json.loads(baseline.read_text())['results'])
+
+            # Generous tolerance: only query-count regressions can fail here
+            out = StringIO()
+            call_command('run_benchmarks', tolerance=100, stdout=out, **options)
+            self.assertIn("No regressions", out.getvalue())
+
+    def test_home_page_is_served_from_cache(self):
+        post = Post.objects.create(title="Rainy season tips", content="...", author=self.farmer_b)
+        Comment.objects.create(post=post, author=self.farmer_b, content="Thanks!")
+        Review.objects.create(farmer=self.farmer_b, content="Very useful")
+        self.client.credentials()
+
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['post'], post)
+        self.assertContains(response, "Thanks!")
+
+        Review.objects.create(farmer=self.farmer_b, content="Saved my harvest")
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['reviews'][0].content, "Saved my harvest")
+
+    def test_post_counters_follow_likes_and_comments(self):
+        post = Post.objects.create(title="Storing beans", content="...", author=self.farmer_b)
+        url = reverse('post-like', args=[post.pk])
+
+        response = self.client.post(url)
+        self.assertEqual(response.data, {'liked': True, 'like_count': 1})
+        self.farmer_b.comment.add(post)
+        comment = Comment.objects.create(post=post, author=self.farmer_a, content="Use ash")
+        post.refresh_from_db()
+        self.assertEqual((post.like_count, post.comment_count), (2, 1))
+
+        # Likes move the counter with F() updates; re-adding or removing a missing like is a no-op
+        farmer_c = Farmer.objects.create_user(username='farmer_c', email='c@test.com', password='password123')
+        with CaptureQueriesContext(connection) as queries:
+            post.likes.add(self.farmer_b)
+            post.likes.remove(farmer_c)
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries))
+        post.refresh_from_db()
+        self.assertEqual(post.like_count, 2)
+
+        self.assertEqual(self.client.delete(url).data['like_count'], 1)
+        self.farmer_b.comment.clear()
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual((post.like_count, post.comment_count), (0, 0))
+
+        # Drifted counters are repaired in bulk
+        post.likes.add(self.farmer_a)
+        Post.objects.update(like_count=7, comment_count=7)
+        call_command('recount_post_counters', stdout=StringIO())
+        self.assertEqual(self.client.get(reverse('post-list')).data['results'][0]['like_count'], 1)
+
+    def test_comment_threads_load_in_constant_queries(self):
+        post = Post.objects.create(title="Fall armyworm", content="...", author=self.farmer_b)
+        url = reverse('post-comments', args=[post.pk])
+        first = self.client.post(url, {'content': "Seen it in Goma"}, format='json').data
+        reply = self.client.post(url, {'content': "Me too", 'parent': first['id']}, format='json').data
+        self.client.post(url, {'content': "Spray early", 'parent': reply['id']}, format='json')
+        self.client.post(url, {'content': "Second thread"}, format='json')
+        self.assertEqual(reply['depth'], 1)
+
+        response = self.client.get(url, {'page_size': 1, 'depth': 2})
+        thread = response.data['results'][0]
+        self.assertEqual(thread['replies'][0]['content'], "Me too")
+        self.assertEqual(thread['replies'][0]['replies'], [])
+        self.assertTrue(thread['replies'][0]['has_more_replies'])
+        second = self.client.get(response.data['next']).data
+        self.assertEqual([c['content'] for c in second['results']], ["Second thread"])
+        self.assertIsNone(second['next'])
+
+        other = Post.objects.create(title="Other", content="...", author=self.farmer_b)
+        other_comment = Comment.objects.create(post=other, author=self.farmer_b, content="Elsewhere")
+        self.assertEqual(self.client.post(url, {'content': "x", 'parent': other_comment.pk}, format='json').status_code, 400)
+
+        # The whole tree, web page included, costs the same however deep or wide it grows
+        self.client.force_login(self.farmer_a)
+        detail = reverse('post_detail', args=[post.pk])
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(detail)
+        parent = Comment.objects.filter(post=post).last()
+        for _ in range(5):
+            parent = Comment.objects.create(post=post, parent=parent, author=self.farmer_b, content="deeper")
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(detail)
+        self.assertEqual(len(after), len(before))
+        self.assertContains(response, "deeper", count=5)
+
+    def test_post_search_ranks_highlights_and_counts_tags(self):
+        soil = Post.objects.create(title="Healthy soil", content="Compost keeps <b>soil</b> alive", author=self.farmer_b)
+        soil.tags.add('compost', 'soil')
+        beans = Post.objects.create(title="Bean harvest", content="Dry beans before storing in good soil", author=self.farmer_b)
+        beans.tags.add('soil')
+        Post.objects.create(title="Market prices", content="Maize sells well", author=self.farmer_b)
+
+        response = self.client.get(reverse('post-list'), {'search': 'soil'})
+        self.assertEqual([post['id'] for post in response.data['results']], [soil.pk, beans.pk])
+        self.assertIn('<mark>soil</mark>', response.data['results'][0]['headline'])
+        # Post content is escaped, only the highlight markup is HTML
+        self.assertIn('&lt;b&gt;', response.data['results'][0]['headline'])
+        self.assertEqual(response.data['facets'][0], {'name': 'soil', 'slug': 'soil', 'count': 2})
+        tagged = self.client.get(reverse('post-list'), {'search': 'soil', 'tag': 'compost'})
+        self.assertEqual([post['id'] for post in tagged.data['results']], [soil.pk])
+
+        self.client.credentials()
+        page = self.client.get(reverse('post_search'), {'q': 'soil'})
+        self.assertContains(page, 'Bean harvest')
+        self.assertContains(page, 'compost (1)')
+        self.assertNotContains(page, 'Market prices')
+
+    def test_token_authentication_is_cached_until_revoked(self):
+        url = reverse('field-list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any('authtoken_token' in query['sql'] for query in queries))
+
+        self.farmer_a.is_active = False
+        self.farmer_a.save()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.farmer_a.is_active = True
+        self.farmer_a.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        Token.objects.get(key=self.token).delete()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_token_revocation_reaches_every_process(self):
+        url = reverse('field-list')
+        self.client.get(url)
+        cache_key = _token_cache_key(self.token)
+        # The shared entry names the user without carrying it (or its password hash)
+        self.assertEqual(set(cache.get(cache_key)), {'user_id', 'is_active', 'version'})
+
+        # Each request gets its own copy of the user
+        first, _ = CachedTokenAuthentication().authenticate_credentials(self.token)
+        second, _ = CachedTokenAuthentication().authenticate_credentials(self.token)
+        self.assertIsNot(first, second)
+        first.farm_name = "Changed in one request"
+        self.assertNotEqual(second.farm_name, first.farm_name)
+
+        # Another worker still holds the user in its own memory when the token is revoked here
+        other_worker = local_tokens.get(cache_key)
+        Token.objects.get(key=self.token).delete()
+        local_tokens.set(cache_key, other_worker)
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_login_resolves_username_or_email_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate(None, username='A@Test.com', password='password123'), self.farmer_a)
+        self.assertEqual(authenticate(None, username='Farmer_B', password='password123'), self.farmer_b)
+        # Unknown users cost the same single query (and a hash) as wrong passwords
+        with self.assertNumQueries(1):
+            self.assertIsNone(authenticate(None, username='nobody@test.com', password='password123'))
+        self.assertIsNone(authenticate(None, username='farmer_a', password='wrong'))
+
+        # Names differing only in case resolve to the exact one
+        shouting = get_user_model().objects.create_user(
+            username='FARMER_A', email='shout@test.com', password='password123'
+        )
+        self.assertEqual(authenticate(None, username='FARMER_A', password='password123'), shouting)
+        self.assertEqual(authenticate(None, username='farmer_a', password='password123'), self.farmer_a)
+
+        # Every failed path hashes once: ambiguous names and accounts without a password too
+        get_user_model().objects.create_user(username='passwordless', email='none@test.com')
+        with mock.patch('django.contrib.auth.base_user.make_password', wraps=make_password) as hashed:
+            self.assertIsNone(authenticate(None, username='Farmer_A', password='password123'))
+            self.assertIsNone(authenticate(None, username='passwordless', password='password123'))
+            self.assertIsNone(authenticate(None, username='nobody', password='password123'))
+        self.assertEqual(hashed.call_count, 3)
+
+    def test_async_endpoints_match_their_sync_versions(self):
+        crop = Crop.objects.create(name="Maize", category="Cereal", fields=self.field_a)
+        Crop.objects.create(name="Beans", category="Legume", fields=self.field_b)
+        Activity.objects.create(title="Weeding", field=self.field_a, crop=crop, farmer=self.farmer_a,
+                                scheduled_date='2030-01-01')
+        SecureRoute.objects.create(farmer=self.farmer_a, route_name="Market road", security_status='red',
+                                   route_path_geojson='{"type": "LineString", "coordinates": [[29.2, -1.6], [29.3, -1.7]]}')
+
+        for sync_name, async_name in [('crop-list', 'async-crop-list'), ('activity-list', 'async-activity-list'),
+                                      ('secure-route-list', 'async-secure-route-list'),
+                                      ('weather-record-list', 'async-weather-list')]:
+            expected = self.client.get(reverse(sync_name)).data['results']
+            response = self.client.get(reverse(async_name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'], json.loads(json.dumps(expected)), async_name)
+            self.assertNotIn('count', response.json())
+
+        overview = self.client.get(reverse('async-overview')).json()
+        self.assertEqual((overview['fields'], overview['crops'], overview['open_activities'], overview['red_routes']),
+                         (1, 1, 1, 1))
+        self.assertEqual(self.client.get(reverse('async-weather-rollups'), {'bucket': 'week'}).status_code, 400)
+
+        # Later pages follow the same keyset cursors as the sync list
+        Crop.objects.create(name="Sorghum", category="Cereal", fields=self.field_a)
+        first = self.client.get(reverse('async-crop-list'), {'page_size': 1}).json()
+        second = self.client.get(first['next']).json()
+        expected = self.client.get(reverse('crop-list')).data['results']
+        self.assertEqual([first['results'][0]['id'], second['results'][0]['id']], [row['id'] for row in expected])
+        self.assertIsNone(second['next'])
+
+        # A revoked token is rejected rather than falling back to the session
+        self.client.force_login(self.farmer_a)
+        self.client.credentials(HTTP_AUTHORIZATION='Token revoked')
+        self.assertEqual(self.client.get(reverse('async-crop-list')).status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse('async-crop-list')).status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('async-crop-list')).status_code, 401)
+
+    def test_dashboard_summarizes_the_farm_in_fixed_queries(self):
+        def add_field(number):
+            field = Field.objects.create(name=f"Plot {number}", farmer=self.farmer_a, size_in_hectares=1)
+            crop = Crop.objects.create(name="Maize", category="Cereal", fields=field, status='growing')
+            Activity.objects.create(title="Weeding", field=field, crop=crop, farmer=self.farmer_a,
+                                    scheduled_date='2099-01-01')
+            for hour in (1, 2):
+                WeatherRecord.objects.create(farmer=self.farmer_a, field=field, temperature=20 + hour,
+                                             humidity=60, rainfall=0, recorded_at=f'2030-01-01T0{hour}:00:00Z')
+            return field
+
+        add_field(1)
+        SecureRoute.objects.create(farmer=self.farmer_a, route_name="Market road", security_status='red')
+        url = reverse('dashboard')
+        self.client.get(url)  # authenticates once, so only the dashboard's own queries differ
+        cache.clear()
+        with CaptureQueriesContext(connection) as one_field:
+            self.client.get(url)
+        for number in range(2, 5):
+            add_field(number)
+        cache.clear()
+        with CaptureQueriesContext(connection) as four_fields:
+            data = self.client.get(url).data
+        self.assertEqual(len(four_fields), len(one_field))
+
+        self.assertEqual(len(data['fields']), 5)
+        plot = data['fields'][1]
+        self.assertEqual((plot['crop_count'], plot['current_crop']), (1, "Maize"))
+        self.assertEqual(plot['latest_weather']['temperature'], 22)
+        self.assertEqual(data['routes'], {'total': 1, 'red': 1, 'yellow': 0})
+        self.assertEqual(data['crop_statuses'], {'growing': 4})
+        self.assertEqual(len(data['upcoming_activities']), 4)
+
+        # Cached until the farm changes
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        Activity.objects.filter(farmer=self.farmer_a).delete()
+        self.assertEqual(self.client.get(url).data['upcoming_activities'], [])
+
+        self.client.force_login(self.farmer_a)
+        self.assertContains(self.client.get(reverse('profile')), "Plot 4")
+
+    def test_field_detail_loads_each_relation_once_and_caches_the_crop_table(self):
+        def add_crop(number):
+            crop = Crop.objects.create(name=f"Crop {number}", category="Cereal", fields=self.field_a, status='growing')
+            Activity.objects.create(title=f"Weeding {number}", field=self.field_a, crop=crop, farmer=self.farmer_a,
+                                    scheduled_date='2099-01-01')
+
+        WeatherRecord.objects.create(farmer=self.farmer_a, field=self.field_a, temperature=23.5,
+                                     humidity=60, rainfall=0, recorded_at='2030-01-01T00:00:00Z')
+        add_crop(1)
+        self.client.force_login(self.farmer_a)
+        url = reverse('field_detail', args=[self.field_a.pk])
+        with CaptureQueriesContext(connection) as one_crop:
+            self.client.get(url)
+        for number in range(2, 6):
+            add_crop(number)
+        with CaptureQueriesContext(connection) as five_crops:
+            response = self.client.get(url)
+        self.assertEqual(len(five_crops), len(one_crop))
+        self.assertContains(response, "Crops Planted Here (5)")
+        self.assertContains(response, "Weeding 5")
+        self.assertContains(response, "23.5")
+
+        # The crop table is served from the cache, so its two queries drop out
+        with CaptureQueriesContext(connection) as cached:
+            self.assertContains(self.client.get(url), "Crop 5")
+        self.assertEqual(len(cached), len(five_crops) - 2)
+        Crop.objects.filter(name="Crop 5").delete()
+        self.assertContains(self.client.get(url), "Crops Planted Here (4)")
+
+        self.assertEqual(self.client.get(reverse('field_detail', args=[self.field_b.pk])).status_code, 404)
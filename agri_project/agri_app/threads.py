@@ -0,0 +1,54 @@
+from .models import Comment
+
+THREAD_PAGE_SIZE = 20
+THREAD_MAX_PAGE_SIZE = 100
+
+
+def build_comment_tree(comments, max_depth=None):
+    """
+    Links comments ordered by path into trees in a single pass and returns the
+    top-level ones; each comment gets .children. With max_depth, comments at
+    that depth are dropped and their parents get has_more_replies instead.
+    """
+    nodes, roots = {}, []
+    for comment in comments:
+        parent = nodes.get(comment.parent_id)
+        if max_depth is not None and comment.depth >= max_depth:
+            if parent is not None:
+                parent.has_more_replies = True
+            continue
+        comment.children = []
+        comment.has_more_replies = False
+        nodes[comment.pk] = comment
+        (parent.children if parent is not None else roots).append(comment)
+    return roots
+
+
+def load_thread(post_id, after=None, limit=None, max_depth=None):
+    """
+    A post's discussion as trees: the top-level comments after the id `after`
+    (at most `limit` of them), each with its replies down to max_depth levels.
+    Takes one query without a limit and two with one, however large the
+    thread. Returns (roots, id to pass as `after` for the next page or None).
+    """
+    comments = Comment.objects.filter(post_id=post_id).select_related('author').order_by('path')
+    if max_depth is not None:
+        # One level more than shown, to know which comments have hidden replies
+        comments = comments.filter(depth__lte=max_depth)
+
+    next_after = None
+    if after is not None or limit is not None:
+        # Top-level paths sort like their ids, and each subtree follows its root,
+        # so a page of threads is the path range from its first root to the next
+        tops = Comment.objects.filter(post_id=post_id, parent=None).order_by('path')
+        if after is not None:
+            tops = tops.filter(pk__gt=after)
+        paths = list(tops.values_list('path', flat=True)[:limit + 1 if limit else None])
+        if not paths:
+            return [], None
+        comments = comments.filter(path__gte=paths[0])
+        if limit and len(paths) > limit:
+            comments = comments.filter(path__lt=paths[limit])
+            next_after = int(paths[limit - 1])
+
+    return build_comment_tree(comments, max_depth), next_after
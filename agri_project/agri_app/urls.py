@@ -1,8 +1,9 @@
 from django.urls import path, include
 from . import views  # import your app views
+from . import async_views
 from django.views.generic import TemplateView
 from rest_framework.routers import SimpleRouter 
-from .api_views import FarmerViewSet , FieldViewSet, CropViewSet, ActivityViewSet, WeatherRecordViewSet, SecureRouteViewSet, ReviewSetView, PostViewSet
+from .api_views import FarmerViewSet , FieldViewSet, CropViewSet, ActivityViewSet, WeatherRecordViewSet, SecureRouteViewSet, ReviewSetView, PostViewSet, SyncView, BatchView, MetricsView, DashboardView
 
 router =  SimpleRouter()
 router.register(r'farmers', FarmerViewSet, basename='farmer'),
@@ -70,6 +71,7 @@ urlpatterns = [
 
     #Comment and Post
     path('post/add/', views.PostCreateView.as_view(), name='post_create'),
+    path('post/search/', views.PostSearchView.as_view(), name='post_search'),
     path('post/<int:pk>/', views.PostDetailView.as_view(), name='post_detail'),
     path('post/<int:pk>/delete', views.PostDeleteView.as_view(), name='post_delete'),
     path('post/<int:post_id>/comment/', views.CommentCreateView.as_view(), name='add_comment'),
@@ -77,6 +79,17 @@ urlpatterns = [
     
     # API sections
 
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    path('api/batch/', BatchView.as_view(), name='batch'),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
+    # Async variants of the read-heavy endpoints (see async_views)
+    path('api/async/overview/', async_views.overview, name='async-overview'),
+    path('api/async/weather/', async_views.weather_list, name='async-weather-list'),
+    path('api/async/weather/rollups/', async_views.weather_rollups, name='async-weather-rollups'),
+    path('api/async/crops/', async_views.crop_list, name='async-crop-list'),
+    path('api/async/activities/', async_views.activity_list, name='async-activity-list'),
+    path('api/async/secure-routes/', async_views.route_list, name='async-secure-route-list'),
     path('api/', include(router.urls)),
 ]
 
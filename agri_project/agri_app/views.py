@@ -10,36 +10,52 @@ from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Count
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from .cache import FarmerCacheMixin, data_version, get_home_content, get_review_eligibility
+from .threads import load_thread
+from .dashboard import get_dashboard
+from .search import search_posts, post_headline, post_tag_facets
+from django.shortcuts import get_object_or_404
 Farmer = get_user_model() 
 # Create your views here.
 
 #----------------
 # Home page 
 #----------------
-def index(request):
+def _home_content():
+    # The discussion is loaded as a tree, so a cached post renders without queries
     featured_post = Post.objects.first()
-    reviews = Review.objects.all().order_by('-created_at')[:5]
+    comments = load_thread(featured_post.pk)[0] if featured_post else []
+    reviews = list(Review.objects.all().order_by('-created_at')[:5])
+    return {'post': featured_post, 'comments': comments, 'reviews': reviews}
+
+def _can_review(user):
+    one_month_ago = timezone.now() - timedelta(days=30)
+    has_recent_review = Review.objects.filter(
+        farmer=user, 
+        created_at__gte=one_month_ago
+    ).exists()
+    is_old_enough = user.date_joined <= one_month_ago
+    return is_old_enough and not has_recent_review
+
+def index(request):
+    content = get_home_content(_home_content)
    
     can_review = False
     if request.user.is_authenticated:
-        one_month_ago = timezone.now() - timedelta(days=30)
-        has_recent_review = Review.objects.filter(
-            farmer=request.user, 
-            created_at__gte=one_month_ago
-        ).exists()
-        is_old_enough = request.user.date_joined <= one_month_ago
+        can_review = get_review_eligibility(request.user.pk, lambda: _can_review(request.user))
         # If they CAN review, send a message that triggers the popup
-        if is_old_enough and not has_recent_review:
+        if can_review:
             messages.info(request, "show_review_modal")
-            can_review = True
 
     context = {
         'word':'welcome home',
-        'reviews': reviews,
+        'reviews': content['reviews'],
         'can_review': can_review,
-        'post': featured_post,
+        'post': content['post'],
+        'comments': content['comments'],
         }
     return render(request , 'index.html', context)
 
@@ -89,8 +105,9 @@ class ProfileDetail(LoginRequiredMixin, DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-
-        context['fields'] = Field.objects.filter(farmer=self.request.user)
+        dashboard = get_dashboard(self.request.user)
+        context['dashboard'] = dashboard
+        context['fields'] = dashboard['fields']
         return context
     
 class FarmerProfileView(LoginRequiredMixin, DetailView):
@@ -121,11 +138,12 @@ class FarmerUpdateView(LoginRequiredMixin, UpdateView):
 # Fields Views
 #------------------
 
-class FieldListView(LoginRequiredMixin, ListView):
+class FieldListView(LoginRequiredMixin, FarmerCacheMixin, ListView):
     """
     Displays a list of all fields belonging to the current logged-in farmer.
     """
     model = Field
+    cache_models = ('field', 'crop')
     context_object_name = 'fields'
     template_name = 'fields/field_list.html'
 
@@ -133,15 +151,41 @@ class FieldListView(LoginRequiredMixin, ListView):
         """
         Overrides the queryset to filter fields by the currently logged-in user.
         """
-        return Field.objects.filter(farmer=self.request.user).annotate(
+        return self.cached_list(Field.objects.filter(farmer=self.request.user).annotate(
             crop_count=Count('crops') 
-        )
+        ))
 
 class FieldDetailView(LoginRequiredMixin, DetailView):
+    """
+    One field with its latest reading, crops and their activities, each loaded
+    in a single query. The crop table is cached until the farmer's fields,
+    crops or activities change.
+    """
     model = Field
+    crop_table_models = ('field', 'crop', 'activity')
     template_name = 'fields/field_detail.html'
     context_object_name = 'field'
 
+    def get_queryset(self):
+        latest_reading = WeatherRecord.objects.filter(field=OuterRef('pk')).order_by('-recorded_at', '-id')
+        return Field.objects.filter(farmer=self.request.user).annotate(
+            latest_weather_id=Subquery(latest_reading.values('id')[:1])
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        field = self.object
+        context['latest_weather'] = (
+            WeatherRecord.objects.filter(pk=field.latest_weather_id).first() if field.latest_weather_id else None
+        )
+        # Left lazy: only evaluated when the cached crop table has to be rendered
+        context['crops'] = field.crops.prefetch_related(
+            Prefetch('activities', queryset=Activity.objects.order_by('scheduled_date', 'id'))
+        )
+        context['crop_table_version'] = data_version(self.request.user.pk, self.crop_table_models)
+        context['crop_table_timeout'] = settings.FARMER_CACHE_TIMEOUT
+        return context
+
     
     
 class FieldCreateView(LoginRequiredMixin, CreateView):
@@ -178,15 +222,19 @@ class FieldDeleteView(LoginRequiredMixin, DeleteView):
 #Crop Views
 #------------------
 
-class CropListView(LoginRequiredMixin, ListView):
+class CropListView(LoginRequiredMixin, FarmerCacheMixin, ListView):
     model = Crop
+    cache_models = ('crop', 'field')
     context_object_name = 'crops'
     template_name = 'crops/crop_list.html'
 
     def get_queryset(self):
-        return Crop.objects.filter(fields__farmer=self.request.user).order_by('status', 'expected_harvest')
-class CropDetailView(LoginRequiredMixin, DetailView):
+        return self.cached_list(
+            Crop.objects.filter(fields__farmer=self.request.user).order_by('status', 'expected_harvest')
+        )
+class CropDetailView(LoginRequiredMixin, FarmerCacheMixin, DetailView):
     model = Crop 
+    cache_models = ('crop', 'field')
     context_object_name = 'crop'
     template_name = 'crops/crop_detail.html'
 
@@ -235,8 +283,9 @@ class CropDeleteView(LoginRequiredMixin, DeleteView):
 # Planting Calendar Views
 #------------------
 
-class ActivityListView(LoginRequiredMixin , ListView):
+class ActivityListView(LoginRequiredMixin , FarmerCacheMixin, ListView):
     model = Activity
+    cache_models = ('activity', 'field', 'crop')
     context_object_name = 'activities'
     template_name = 'activities/activity_list.html'
 
@@ -247,7 +296,7 @@ class ActivityListView(LoginRequiredMixin , ListView):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
-        return queryset.order_by('scheduled_date')
+        return self.cached_list(queryset.order_by('scheduled_date'))
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -256,8 +305,9 @@ class ActivityListView(LoginRequiredMixin , ListView):
         context['status_choices'] = Activity.STATUS_CHOICES 
         return context
     
-class ActivityDetailView(generic.DetailView):
+class ActivityDetailView(LoginRequiredMixin, FarmerCacheMixin, generic.DetailView):
     model = Activity
+    cache_models = ('activity', 'field', 'crop')
     context_object_name = 'activity'
     template_name = 'activities/activity_detail.html'
 
@@ -375,15 +425,17 @@ class WeatherRecordDeleteView(LoginRequiredMixin, DeleteView):
 # Route Safety Record Views
 #------------------
 
-class SecureRouteListView(LoginRequiredMixin, ListView):
+class SecureRouteListView(LoginRequiredMixin, FarmerCacheMixin, ListView):
     model = SecureRoute
+    cache_models = ('secureroute',)
     context_object_name='secure_route_list'
     template_name = 'routes/secure_route_list.html'
 
     def get_queryset(self):
-        return SecureRoute.objects.filter(farmer=self.request.user)
-class SecureRouteDetailView(LoginRequiredMixin, DetailView):
+        return self.cached_list(SecureRoute.objects.filter(farmer=self.request.user))
+class SecureRouteDetailView(LoginRequiredMixin, FarmerCacheMixin, DetailView):
     model = SecureRoute
+    cache_models = ('secureroute',)
     context_object_name='secure_route_detail'
     template_name = 'routes/secure_route_detail.html'
 
@@ -448,7 +500,36 @@ class PostDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['comment_form'] = CommentForm()
+        context['comments'] = load_thread(self.object.pk)[0]
+
+        return context
+
+class PostSearchView(ListView):
+    """Public search over community posts: ?q=<terms>&tag=<slug>, ranked and highlighted."""
+    model = Post
+    template_name = 'blog/post_search.html'
+    context_object_name = 'posts'
+    paginate_by = 20
 
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        self.tag = self.request.GET.get('tag', '')
+        self.matches = Post.objects.select_related('author')
+        if self.query:
+            self.matches = search_posts(self.matches, self.query)
+        queryset = self.matches
+        if self.tag:
+            queryset = queryset.filter(tags__slug=self.tag)
+        return queryset if self.query or self.tag else Post.objects.none()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for post in context['posts']:
+            post.highlighted = post_headline(post, self.query)
+        context['query'] = self.query
+        context['current_tag'] = self.tag
+        # Facets cover every match, so picking a tag shows what else is there
+        context['facets'] = post_tag_facets(self.matches) if self.query else []
         return context
 
 class PostDeleteView(LoginRequiredMixin, DeleteView):
@@ -469,7 +550,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         
         parent_id = self.request.POST.get('parent_id')
         if parent_id:
-            form.instance.parent_id = parent_id
+            form.instance.parent = get_object_or_404(Comment, pk=parent_id, post_id=self.kwargs['post_id'])
         return super().form_valid(form)
     
     def get_success_url(self):
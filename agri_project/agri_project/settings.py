@@ -67,6 +67,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'widget_tweaks',
     'agri_app.apps.AgriAppConfig',
     'rest_framework',
@@ -75,6 +76,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'agri_app.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.csp.ContentSecurityPolicyMiddleware',
@@ -128,6 +131,41 @@ DATABASES = {
 db_from_env = dj_database_url.config(conn_max_age=600)
 DATABASES['default'].update(db_from_env)
 
+# Cache
+# Every worker must see the same entries: writes bump per-farmer version keys
+# and revoke token lookups, and a per-process cache would keep serving the old
+# data in the other workers. Redis when REDIS_URL is set, otherwise a database
+# table (created by `python manage.py createcachetable`, see build.sh).
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'agri',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'agri_cache',
+            'KEY_PREFIX': 'agri',
+        }
+    }
+
+# Seconds a cached per-farmer response lives; edits invalidate it sooner
+FARMER_CACHE_TIMEOUT = int(os.environ.get('FARMER_CACHE_TIMEOUT', 60 * 60))
+
+# API token lookups: entries kept per process (LRU) and how long each copy
+# lives there and in the shared cache; token or user changes clear them sooner
+TOKEN_AUTH_LOCAL_SIZE = int(os.environ.get('TOKEN_AUTH_LOCAL_SIZE', 10000))
+TOKEN_AUTH_LOCAL_TTL = int(os.environ.get('TOKEN_AUTH_LOCAL_TTL', 30))
+TOKEN_AUTH_CACHE_TIMEOUT = int(os.environ.get('TOKEN_AUTH_CACHE_TIMEOUT', 15 * 60))
+
+# Requests slower than this are logged to 'agri_app.slow_requests' with their slowest queries
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 1000))
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -187,9 +225,10 @@ LOGOUT_REDIRECT_URL = '/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# EmailOrUsernameBackend extends ModelBackend; listing both would check a
+# failed password twice
 AUTHENTICATION_BACKENDS = [
     'agri_app.backends.EmailOrUsernameBackend', 
-    'django.contrib.auth.backends.ModelBackend',     
 ]
 
 PASSWORD_CHANGE_REDIRECT_URL = 'password_change_done'
@@ -201,10 +240,13 @@ AUTH_USER_MODEL = "agri_app.Farmer"
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication', 
+        'agri_app.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication', 
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated', 
     ],
+    # Keyset pagination: each viewset declares its `ordering`
+    'DEFAULT_PAGINATION_CLASS': 'agri_app.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 50,
 }
\ No newline at end of file